@@ -0,0 +1,146 @@
+import json
+import logging
+import os
+import pygame
+
+# -----------------------------------------------------------------------------
+# Sprite atlas & lazy overlays
+# -----------------------------------------------------------------------------
+# Purpose:
+#   Keep startup short: the small sprites (particles, buttons) are cropped
+#   once and packed into a single atlas image cached on disk, and the large
+#   overlay images are only loaded and scaled when they are first shown.
+#
+# Atlas cache (load_sprites):
+#   - ATLAS_DIR/atlas.png holds every cropped sprite; atlas.json records the
+#     rectangle of each one plus the size and modification time of the
+#     source PNG it was made from.
+#   - If any source file changed (or the cache is missing or unreadable) the
+#     atlas is rebuilt from the PNGs and written again. Failing to write it
+#     is logged and otherwise ignored; the sprites are still returned.
+#   - Sprites are subsurfaces of the one converted atlas surface.
+#
+# Overlays (Overlay):
+#   - The source image is loaded and cropped on the first get().
+#   - The scaled copy is kept for the current window size and only rebuilt
+#     when the size changes, i.e. at most once per VIDEORESIZE.
+# -----------------------------------------------------------------------------
+ATLAS_DIR = "asset_cache"
+ATLAS_VERSION = 1
+ATLAS_WIDTH = 1024
+ATLAS_PADDING = 1
+
+
+# -----------------------------------------------------------------------------
+# Utility: crop_transparency(image) -> Surface
+# -----------------------------------------------------------------------------
+# Purpose:
+#   Trim fully transparent borders from sprites so rendering/interaction uses a
+#   tight bounding box.
+#
+# Details:
+#   - get_bounding_rect():
+#       Returns a Rect that bounds all pixels with alpha > 0.
+#   - subsurface(rect).copy():
+#       Cuts the image down to that rectangle and returns an independent Surface
+#       copy, so later operations don’t reference the original larger surface.
+# -----------------------------------------------------------------------------
+def crop_transparency(image: pygame.Surface) -> pygame.Surface:
+    rect = image.get_bounding_rect()  # Finds non-transparent area
+    return image.subsurface(rect).copy()
+
+
+def _source_stamp(path):
+    status = os.stat(path)
+    return [status.st_size, status.st_mtime_ns]
+
+
+def _pack(sizes):
+    """
+    Shelf packing: place (width, height) boxes in rows of ATLAS_WIDTH, tallest
+    first. Returns the top-left of each box and the atlas height.
+    """
+    order = sorted(range(len(sizes)), key=lambda k: -sizes[k][1])
+    positions = [None] * len(sizes)
+    x = y = shelf_height = 0
+    for k in order:
+        width, height = sizes[k]
+        if x + width > ATLAS_WIDTH and x > 0:
+            x, y = 0, y + shelf_height + ATLAS_PADDING
+            shelf_height = 0
+        positions[k] = (x, y)
+        x += width + ATLAS_PADDING
+        shelf_height = max(shelf_height, height)
+    return positions, y + shelf_height
+
+
+def _read_atlas(manifest_path, image_path, stamps):
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") != ATLAS_VERSION or manifest.get("sources") != stamps:
+            return None
+        atlas = pygame.image.load(image_path).convert_alpha()
+        return {name: atlas.subsurface(pygame.Rect(rect)) for name, rect in manifest["rects"].items()}
+    except (OSError, ValueError, KeyError, pygame.error):
+        return None
+
+
+def _build_atlas(files, manifest_path, image_path, stamps):
+    images = {name: crop_transparency(pygame.image.load(path).convert_alpha()) for name, path in files.items()}
+    names = list(images)
+    positions, height = _pack([images[name].get_size() for name in names])
+    atlas = pygame.Surface((ATLAS_WIDTH, max(1, height)), pygame.SRCALPHA)
+    rects = {}
+    for name, position in zip(names, positions):
+        atlas.blit(images[name], position)
+        rects[name] = [position[0], position[1], *images[name].get_size()]
+
+    try:
+        os.makedirs(os.path.dirname(image_path) or ".", exist_ok=True)
+        pygame.image.save(atlas, image_path)
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump({"version": ATLAS_VERSION, "sources": stamps, "rects": rects}, f)
+    except (OSError, pygame.error) as error:
+        logging.error(f"Failed to write sprite atlas cache: {error}")
+
+    atlas = atlas.convert_alpha()
+    return {name: atlas.subsurface(pygame.Rect(rect)) for name, rect in rects.items()}
+
+
+def load_sprites(files, cache_dir=ATLAS_DIR):
+    """
+    Cropped sprites for {name: png path}, from the cached atlas when it is up
+    to date. Needs a display mode to be set (for convert_alpha).
+    """
+    stamps = {name: _source_stamp(path) for name, path in files.items()}
+    manifest_path = os.path.join(cache_dir, "atlas.json")
+    image_path = os.path.join(cache_dir, "atlas.png")
+    sprites = _read_atlas(manifest_path, image_path, stamps)
+    if sprites is None:
+        sprites = _build_atlas(files, manifest_path, image_path, stamps)
+    return sprites
+
+
+class Overlay:
+    """
+    Full-window image loaded on first use and scaled to a fraction of the
+    window: get((width, height)) returns the scaled surface.
+    """
+    def __init__(self, path, width_fraction, height_fraction):
+        self.path = path
+        self.width_fraction = width_fraction
+        self.height_fraction = height_fraction
+        self._image = None
+        self._scaled = None
+        self._window_size = None
+
+    def get(self, window_size):
+        if self._image is None:
+            self._image = crop_transparency(pygame.image.load(self.path).convert_alpha())
+        if self._window_size != window_size:
+            width, height = window_size
+            self._scaled = pygame.transform.scale(
+                self._image, (int(width * self.width_fraction), int(height * self.height_fraction)))
+            self._window_size = window_size
+        return self._scaled
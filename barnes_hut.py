@@ -0,0 +1,186 @@
+import numpy as np
+from cell_list import expand_ranges
+
+# -----------------------------------------------------------------------------
+# Barnes–Hut quadtree for the 1/r² electromagnetic interaction
+# -----------------------------------------------------------------------------
+# Purpose:
+#   Approximate the Coulomb force from distant groups of charges by the force
+#   from their aggregate, bringing the cost down from O(N²) to ~O(N log N).
+#
+# Details:
+#   - The tree is a linear quadtree: particles are sorted by Morton (Z-order)
+#     key, so every node is a contiguous range [start, end) of the sorted order
+#     and the children of a node are contiguous in the node arrays.
+#   - Charges have both signs, so a single "centre of mass" would cancel out.
+#     Each node keeps the positive and negative charge separately, each with
+#     its own charge-weighted centre, and a distant node acts as two point
+#     charges.
+#   - The opening test is width / distance < theta, where distance is measured
+#     to the node's |charge|-weighted centre. theta = 0 gives the exact direct
+#     sum; larger values trade accuracy for speed.
+#   - Nodes with at most leaf_size particles (or at MAX_DEPTH) are leaves and
+#     their members are summed directly.
+#   - Traversal is done for all particles at once: a frontier of
+#     (particle, node) pairs is accepted, summed directly or expanded into
+#     children until it is empty.
+# -----------------------------------------------------------------------------
+MAX_DEPTH = 16
+
+
+def _spread_bits(v):
+    # Insert a zero bit between each of the low 16 bits of v.
+    v = v & 0xFFFF
+    v = (v | (v << 8)) & 0x00FF00FF
+    v = (v | (v << 4)) & 0x0F0F0F0F
+    v = (v | (v << 2)) & 0x33333333
+    v = (v | (v << 1)) & 0x55555555
+    return v
+
+
+class Barnes_Hut_Tree:
+    """
+    Quadtree over a set of charged particles, rebuilt from scratch each frame.
+    - build cost is a sort plus one vectorized pass per tree level
+    - net_force(k, theta) returns the approximate Coulomb force on every particle
+    """
+    def __init__(self, x, y, charge, leaf_size=8):
+        self.x = np.asarray(x, dtype=float)
+        self.y = np.asarray(y, dtype=float)
+        self.charge = np.asarray(charge, dtype=float)
+        self.leaf_size = max(1, int(leaf_size))
+        self.count = len(self.x)
+        if self.count:
+            self._build()
+
+    def _build(self):
+        n = self.count
+        x0, y0 = self.x.min(), self.y.min()
+        size = max(self.x.max() - x0, self.y.max() - y0, 1.0) * (1 + 1e-9)
+        cells = 1 << MAX_DEPTH
+        ix = np.clip(((self.x - x0) / size * cells).astype(np.int64), 0, cells - 1)
+        iy = np.clip(((self.y - y0) / size * cells).astype(np.int64), 0, cells - 1)
+        key = _spread_bits(ix) | (_spread_bits(iy) << 1)
+
+        self.order = np.argsort(key, kind="stable")
+        self.rank = np.empty(n, dtype=np.int64)
+        self.rank[self.order] = np.arange(n)
+        key = key[self.order]
+        xs, ys, qs = self.x[self.order], self.y[self.order], self.charge[self.order]
+
+        # Prefix sums so any node's aggregates are an O(1) difference.
+        q_pos = np.maximum(qs, 0.0)
+        q_neg = np.minimum(qs, 0.0)
+        q_abs = np.abs(qs)
+        columns = np.stack([q_pos, q_pos * xs, q_pos * ys,
+                            q_neg, q_neg * xs, q_neg * ys,
+                            q_abs, q_abs * xs, q_abs * ys])
+        prefix = np.zeros((columns.shape[0], n + 1))
+        np.cumsum(columns, axis=1, out=prefix[:, 1:])
+
+        # Level-by-level construction.
+        starts, ends, levels, first_child, n_children = [], [], [], [], []
+        level_starts = np.array([0])
+        level_ends = np.array([n])
+        node_offset = 0
+        for level in range(MAX_DEPTH + 1):
+            count = len(level_starts)
+            starts.append(level_starts)
+            ends.append(level_ends)
+            levels.append(np.full(count, level))
+
+            split = (level_ends - level_starts > self.leaf_size) if level < MAX_DEPTH else np.zeros(count, bool)
+            children_first = np.zeros(count, dtype=np.int64)
+            children_count = np.zeros(count, dtype=np.int64)
+            next_offset = node_offset + count
+
+            if split.any():
+                split_starts, split_ends = level_starts[split], level_ends[split]
+                owner, position = expand_ranges(split_starts, split_ends - split_starts)
+                cell = key[position] >> (2 * (MAX_DEPTH - level - 1))
+                new_cell = np.ones(len(position), dtype=bool)
+                new_cell[1:] = (cell[1:] != cell[:-1]) | (owner[1:] != owner[:-1])
+
+                child_parent = owner[new_cell]
+                child_starts = position[new_cell]
+                child_ends = np.minimum(np.append(child_starts[1:], n), split_ends[child_parent])
+
+                per_parent = np.bincount(child_parent, minlength=len(split_starts))
+                children_count[split] = per_parent
+                children_first[split] = next_offset + np.cumsum(per_parent) - per_parent
+
+                level_starts, level_ends = child_starts, child_ends
+            else:
+                level_starts = level_ends = np.array([], dtype=np.int64)
+
+            first_child.append(children_first)
+            n_children.append(children_count)
+            node_offset = next_offset
+            if not split.any():
+                break
+
+        self.node_start = np.concatenate(starts)
+        self.node_end = np.concatenate(ends)
+        self.node_width = size / (2.0 ** np.concatenate(levels))
+        self.first_child = np.concatenate(first_child)
+        self.n_children = np.concatenate(n_children)
+
+        sums = prefix[:, self.node_end] - prefix[:, self.node_start]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.q_pos = sums[0]
+            self.pos_x, self.pos_y = sums[1] / sums[0], sums[2] / sums[0]
+            self.q_neg = sums[3]
+            self.neg_x, self.neg_y = sums[4] / sums[3], sums[5] / sums[3]
+            self.abs_x, self.abs_y = sums[7] / sums[6], sums[8] / sums[6]
+
+    def net_force(self, COLOUMBS_CONSTANT=70, theta=0.5):
+        n = self.count
+        net_x = np.zeros(n)
+        net_y = np.zeros(n)
+        if n < 2:
+            return net_x, net_y
+
+        def accumulate(target, dx, dy, source_charge):
+            # Same law and cutoff as Electromagnetic_force.calculate_force.
+            distance = np.hypot(dx, dy)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                scale = -(COLOUMBS_CONSTANT * self.charge[target] * source_charge) / distance ** 3
+            scale = np.where((distance >= 1) & (source_charge != 0), scale, 0.0)
+            net_x[:] += np.bincount(target, scale * dx, minlength=n)
+            net_y[:] += np.bincount(target, scale * dy, minlength=n)
+
+        target = np.arange(n)
+        node = np.zeros(n, dtype=np.int64)
+        while len(target):
+            tx, ty = self.x[target], self.y[target]
+            start, end = self.node_start[node], self.node_end[node]
+            contains_self = (self.rank[target] >= start) & (self.rank[target] < end)
+            distance = np.hypot(self.abs_x[node] - tx, self.abs_y[node] - ty)
+            accept = ~contains_self & (self.node_width[node] < theta * distance)
+
+            # Far nodes: one positive and one negative point charge each.
+            far_target, far_node = target[accept], node[accept]
+            pos = self.q_pos[far_node] != 0
+            accumulate(far_target[pos], self.pos_x[far_node[pos]] - tx[accept][pos],
+                       self.pos_y[far_node[pos]] - ty[accept][pos], self.q_pos[far_node[pos]])
+            neg = self.q_neg[far_node] != 0
+            accumulate(far_target[neg], self.neg_x[far_node[neg]] - tx[accept][neg],
+                       self.neg_y[far_node[neg]] - ty[accept][neg], self.q_neg[far_node[neg]])
+
+            # Opened leaves: direct sum over their members.
+            opened = ~accept
+            leaf = opened & (self.n_children[node] == 0)
+            owner, position = expand_ranges(start[leaf], end[leaf] - start[leaf])
+            leaf_target = target[leaf][owner]
+            source = self.order[position]
+            not_self = source != leaf_target
+            leaf_target, source = leaf_target[not_self], source[not_self]
+            accumulate(leaf_target, self.x[source] - self.x[leaf_target],
+                       self.y[source] - self.y[leaf_target], self.charge[source])
+
+            # Opened internal nodes: descend into the children.
+            inner = opened & ~leaf
+            owner, child = expand_ranges(self.first_child[node[inner]], self.n_children[node[inner]])
+            target, node = target[inner][owner], child
+
+        return net_x, net_y
@@ -0,0 +1,187 @@
+import os
+
+# Offscreen rendering: must be set before pygame initialises its video driver.
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import argparse
+import json
+import platform
+import subprocess
+import time
+
+import numpy as np
+import pygame
+
+from forces import Electromagnetic_force, strong_nuclear_force
+from particle_store import Particle_Store, PROTON, NEUTRON, ELECTRON, NEUTRINO
+from renderer import Particle_Renderer
+from scenes import SCENES, WIDTH, HEIGHT
+from simulation import Simulation
+
+# -----------------------------------------------------------------------------
+# Benchmark suite
+# -----------------------------------------------------------------------------
+# Times each stage of a frame on its own for synthetic scenes of growing size:
+#
+#   - em_direct / em_barnes_hut / em_particle_mesh:
+#                                     Electromagnetic_force modes (the mesh
+#                                     kernel is cached across repeats)
+#   - strong_direct / strong_cell_list: strong_nuclear_force modes
+#   - force_field:                    EM + strong in one fused Force_Field pass
+#   - integration:                    Simulation.integrate (forces precomputed)
+#                                     on a copy of the scene, reset before
+#                                     every repeat so each times the same state
+#   - render:                         Particle_Renderer full redraw (culled,
+#                                     batched) onto an offscreen surface
+#   - render_per_blit:                one blit() call per particle, for
+#                                     comparison with the batched path
+#
+# Usage:
+#   python benchmark.py --sizes 10,100,1000,10000 --output bench.json
+#   python benchmark.py --output new.json --compare old.json
+#
+# The JSON output records the git commit and library versions next to the
+# best and mean time of every (scene, size, stage) so runs from different
+# commits can be compared with --compare.
+# -----------------------------------------------------------------------------
+DEFAULT_SIZES = (10, 100, 1000, 10000)
+SPRITES = {PROTON: "proton.png", NEUTRON: "neutron.png", ELECTRON: "electron.png", NEUTRINO: "neutrino.png"}
+
+
+def load_sprites():
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+    here = os.path.dirname(os.path.abspath(__file__))
+    sprites = {}
+    for species, filename in SPRITES.items():
+        image = pygame.image.load(os.path.join(here, filename)).convert_alpha()
+        sprites[species] = image.subsurface(image.get_bounding_rect()).copy()
+    return sprites
+
+
+def render_per_blit(surface, particles, sprites):
+    surface.fill((0, 0, 0))
+    for species, x, y in zip(particles.species.tolist(), particles.x.tolist(), particles.y.tolist()):
+        surface.blit(sprites[species], (x, y))
+
+
+def time_stage(function, repeat, setup=None):
+    """
+    Best and mean time of function over repeat calls; setup (untimed) runs
+    before each call.
+    """
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return min(samples), sum(samples) / len(samples)
+
+
+def stages(particles, sprites, surface):
+    """
+    {stage name: (function, setup or None)} for one scene.
+    """
+    x, y = particles.x, particles.y
+    simulation = Simulation(particles=particles)
+    fx, fy = simulation.compute_forces()
+
+    # integrate() moves the particles in place, so it runs on a copy that is
+    # put back before every repeat; the scene itself stays put for the rest.
+    moving = Particle_Store(len(particles))
+    moving.extend(particles.species, x, y, particles.vx, particles.vy)
+    moving_simulation = Simulation(particles=moving)
+
+    def reset_moving():
+        moving.x[:], moving.y[:] = x, y
+        moving.vx[:], moving.vy[:] = particles.vx, particles.vy
+
+    renderer = Particle_Renderer(sprites)
+    particle_mesh = Electromagnetic_force(mode="particle_mesh")
+    return {
+        "em_direct": (lambda: Electromagnetic_force().calculate_net_force_arrays(x, y, particles.charge), None),
+        "em_barnes_hut": (lambda: Electromagnetic_force(mode="barnes_hut").calculate_net_force_arrays(
+            x, y, particles.charge), None),
+        "em_particle_mesh": (lambda: particle_mesh.calculate_net_force_arrays(x, y, particles.charge), None),
+        "strong_direct": (lambda: strong_nuclear_force().calculate_net_force_arrays(x, y, particles.mass), None),
+        "strong_cell_list": (lambda: strong_nuclear_force(mode="cell_list").calculate_net_force_arrays(
+            x, y, particles.mass), None),
+        "force_field": (lambda: simulation.force_field.calculate_net_force_arrays(
+            x, y, particles.charge, particles.mass), None),
+        "integration": (lambda: moving_simulation.integrate(fx, fy), reset_moving),
+        "render": (lambda: renderer.draw(surface, particles.species, x, y, full=True), None),
+        "render_per_blit": (lambda: render_per_blit(surface, particles, sprites), None),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run(sizes, scene_names, repeat, stage_names=None):
+    sprites = load_sprites()
+    surface = pygame.Surface((WIDTH, HEIGHT))
+    results = []
+    for scene_name in scene_names:
+        for size in sizes:
+            particles = SCENES[scene_name](size)
+            for stage_name, (function, setup) in stages(particles, sprites, surface).items():
+                if stage_names is not None and stage_name not in stage_names:
+                    continue
+                best, mean = time_stage(function, repeat, setup)
+                results.append({"scene": scene_name, "n": size, "stage": stage_name,
+                                "best_seconds": best, "mean_seconds": mean})
+                print(f"{scene_name:>7} n={size:<6} {stage_name:<17} {best * 1000:10.3f} ms")
+    return {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pygame": pygame.version.ver,
+        "machine": platform.machine(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def compare(current, baseline):
+    """
+    Print current/baseline time ratios for every measurement found in both.
+    """
+    old = {(r["scene"], r["n"], r["stage"]): r["best_seconds"] for r in baseline["results"]}
+    print(f"\ncompared with {baseline.get('commit') or 'baseline'}:")
+    for r in current["results"]:
+        key = (r["scene"], r["n"], r["stage"])
+        if key in old and old[key] > 0:
+            print(f"{r['scene']:>7} n={r['n']:<6} {r['stage']:<17} x{r['best_seconds'] / old[key]:.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark force evaluation, integration and rendering.")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="comma-separated particle counts")
+    parser.add_argument("--scenes", default=",".join(SCENES), help="comma-separated scene names")
+    parser.add_argument("--stages", default=None, help="comma-separated stage names (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed repetitions per stage")
+    parser.add_argument("--output", default="bench_results.json", help="JSON results file")
+    parser.add_argument("--compare", metavar="PATH", help="earlier results file to compare against")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    stage_names = args.stages.split(",") if args.stages else None
+    report = run(sizes, args.scenes.split(","), args.repeat, stage_names)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import numpy as np
+
+# -----------------------------------------------------------------------------
+# Domain boundaries
+# -----------------------------------------------------------------------------
+# Purpose:
+#   Without a boundary, particles thrown out by strong repulsion keep flying
+#   away forever and still cost work in every force pass. A Domain_Boundary
+#   keeps the working set on the domain [0, width] x [0, height] (normally
+#   the window), applied after every step (see Simulation).
+#
+# Policies:
+#   - "reflect":  particles that cross an edge are mirrored back inside and
+#                 the normal component of their velocity is reversed.
+#   - "periodic": positions wrap around, and the force field measures every
+#                 pair separation to the nearest periodic copy (minimum
+#                 image), so the domain has no edges at all. Needs the force
+#                 models in direct mode. Coarsening still finds clusters
+#                 without wrapping, so it is approximate at the seams.
+#   - "evict":    particles further than margin outside the domain are
+#                 removed from the simulation. evicted counts the removals of
+#                 the last step, evicted_total those since the start.
+# -----------------------------------------------------------------------------
+POLICIES = ("reflect", "periodic", "evict")
+EVICT_MARGIN = 200
+
+
+class Domain_Boundary:
+    """
+    Boundary policy for a width x height domain.
+    - apply(simulation) after each step
+    - resize(width, height) when the window changes
+    - period is (width, height) for "periodic", else None
+    """
+    def __init__(self, policy, width, height, margin=EVICT_MARGIN):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown boundary policy: {policy!r}")
+        self.policy = policy
+        self.width = width
+        self.height = height
+        self.margin = margin
+        self.evicted = 0
+        self.evicted_total = 0
+
+    @property
+    def period(self):
+        return (self.width, self.height) if self.policy == "periodic" else None
+
+    def resize(self, width, height):
+        self.width = width
+        self.height = height
+
+    def apply(self, simulation):
+        particles = simulation.particles
+        if self.policy == "reflect":
+            _reflect(particles.x, particles.vx, self.width)
+            _reflect(particles.y, particles.vy, self.height)
+        elif self.policy == "periodic":
+            np.mod(particles.x, self.width, out=particles.x)
+            np.mod(particles.y, self.height, out=particles.y)
+        else:
+            x, y, margin = particles.x, particles.y, self.margin
+            outside = (x < -margin) | (x > self.width + margin) | (y < -margin) | (y > self.height + margin)
+            self.evicted = simulation.remove_particles(outside) if outside.any() else 0
+            self.evicted_total += self.evicted
+
+
+def _reflect(position, velocity, size):
+    low = position < 0
+    position[low] = -position[low]
+    velocity[low] = np.abs(velocity[low])
+    high = position > size
+    position[high] = 2 * size - position[high]
+    velocity[high] = -np.abs(velocity[high])
+    # Overshooting by more than the whole domain: just clamp.
+    np.clip(position, 0, size, out=position)
@@ -0,0 +1,116 @@
+import numpy as np
+
+# -----------------------------------------------------------------------------
+# Uniform-grid neighbour search (cell lists)
+# -----------------------------------------------------------------------------
+# Purpose:
+#   Find every pair of particles closer than a cutoff without testing all N²
+#   pairs, for short-range forces such as strong_nuclear_force.
+#
+# Details:
+#   - Particles are binned into square cells of side = cutoff, so partners
+#     within the cutoff can only be in the same or an adjacent cell.
+#   - Only half of the 3x3 neighbourhood is visited (HALF_STENCIL), which
+#     yields each unordered pair exactly once.
+#   - Cells are found by sorting on an integer cell key; no Python loop over
+#     particles or cells.
+# -----------------------------------------------------------------------------
+HALF_STENCIL = ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1))
+
+
+def expand_ranges(starts, counts):
+    """
+    For ranges [starts[k], starts[k] + counts[k]) return (owner, value) arrays
+    listing every value together with the index k of the range it came from.
+    """
+    owner = np.repeat(np.arange(len(counts)), counts)
+    offsets = np.arange(len(owner)) - np.repeat(np.cumsum(counts) - counts, counts)
+    return owner, starts[owner] + offsets
+
+
+def neighbour_pairs(x, y, cutoff):
+    """
+    Return index arrays (i, j) of every unordered pair closer than cutoff.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    empty = np.array([], dtype=np.int64)
+    if len(x) < 2 or cutoff <= 0:
+        return empty, empty
+
+    cx = np.floor(x / cutoff).astype(np.int64)
+    cy = np.floor(y / cutoff).astype(np.int64)
+    cx -= cx.min()
+    cy -= cy.min()
+    # One spare row either side so the -1/+1 stencil offsets never alias.
+    width = int(cy.max()) + 3
+    key = cx * width + (cy + 1)
+
+    order = np.argsort(key, kind="stable")
+    cell_keys, cell_start, cell_count = np.unique(key[order], return_index=True, return_counts=True)
+
+    pairs_i, pairs_j = [], []
+    for ox, oy in HALF_STENCIL:
+        neighbour_key = cell_keys + ox * width + oy
+        location = np.minimum(np.searchsorted(cell_keys, neighbour_key), len(cell_keys) - 1)
+        found = cell_keys[location] == neighbour_key
+        a = np.flatnonzero(found)
+        b = location[found]
+
+        count_b = cell_count[b]
+        owner, pair = expand_ranges(np.zeros(len(a), dtype=np.int64), cell_count[a] * count_b)
+        local_a = pair // count_b[owner]
+        local_b = pair % count_b[owner]
+        if ox == 0 and oy == 0:
+            # Same cell: keep each unordered pair once and skip self-pairs.
+            keep = local_a < local_b
+            owner, local_a, local_b = owner[keep], local_a[keep], local_b[keep]
+
+        i = order[cell_start[a][owner] + local_a]
+        j = order[cell_start[b][owner] + local_b]
+        close = np.hypot(x[j] - x[i], y[j] - y[i]) < cutoff
+        pairs_i.append(i[close])
+        pairs_j.append(j[close])
+
+    return np.concatenate(pairs_i), np.concatenate(pairs_j)
+
+
+def points_in_boxes(x, y, qx, qy, half_width, cell_size):
+    """
+    Return index arrays (query, point) of every point (x, y) inside the square
+    of side 2 * half_width[q] around query point (qx[q], qy[q]) (candidates
+    for a per-query radius test). Each query only visits the cells its own
+    square covers, so one large query does not slow down the others.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    qx = np.asarray(qx, dtype=float)
+    qy = np.asarray(qy, dtype=float)
+    half_width = np.broadcast_to(np.asarray(half_width, dtype=float), qx.shape)
+    empty = np.array([], dtype=np.int64)
+    if len(x) == 0 or len(qx) == 0:
+        return empty, empty
+
+    x0, y0 = x.min(), y.min()
+    cx = np.floor((x - x0) / cell_size).astype(np.int64)
+    cy = np.floor((y - y0) / cell_size).astype(np.int64)
+    columns, rows = int(cx.max()) + 1, int(cy.max()) + 1
+    key = cx * rows + cy
+    order = np.argsort(key, kind="stable")
+    sorted_key = key[order]
+
+    # Cell range of each query's square, clipped to the occupied grid.
+    first_x = np.clip(np.floor((qx - half_width - x0) / cell_size), 0, columns).astype(np.int64)
+    last_x = np.clip(np.floor((qx + half_width - x0) / cell_size), -1, columns - 1).astype(np.int64)
+    first_y = np.clip(np.floor((qy - half_width - y0) / cell_size), 0, rows).astype(np.int64)
+    last_y = np.clip(np.floor((qy + half_width - y0) / cell_size), -1, rows - 1).astype(np.int64)
+
+    # One entry per (query, column): the column's cells first_y..last_y are
+    # contiguous in key order, so they are one range of the sorted points.
+    query, column = expand_ranges(first_x, np.maximum(last_x - first_x + 1, 0))
+    start = np.searchsorted(sorted_key, column * rows + first_y[query], side="left")
+    stop = np.searchsorted(sorted_key, column * rows + last_y[query], side="right")
+    owner, position = expand_ranges(start, np.maximum(stop - start, 0))
+    query, point = query[owner], order[position]
+    inside = (np.abs(x[point] - qx[query]) <= half_width[query]) & (np.abs(y[point] - qy[query]) <= half_width[query])
+    return query[inside], point[inside]
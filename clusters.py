@@ -0,0 +1,53 @@
+import numpy as np
+from cell_list import neighbour_pairs
+
+# -----------------------------------------------------------------------------
+# Cluster detection
+# -----------------------------------------------------------------------------
+# Two particles belong to the same cluster when they are closer than
+# link_distance, directly or through a chain of other particles
+# ("friends of friends"). Candidate pairs come from the cell list and the
+# connected components are found with a vectorized union-find.
+# -----------------------------------------------------------------------------
+LINK_DISTANCE = 15
+
+
+def _connected_components(n, i, j):
+    """
+    Label connected components of the graph with n nodes and edges (i, j).
+    Every node gets the smallest node index in its component as its label.
+    """
+    labels = np.arange(n)
+    if len(i) == 0:
+        return labels
+    while True:
+        smallest = np.minimum(labels[i], labels[j])
+        previous = labels.copy()
+        np.minimum.at(labels, i, smallest)
+        np.minimum.at(labels, j, smallest)
+        # Pointer jumping: follow labels to their roots.
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+        if np.array_equal(labels, previous):
+            return labels
+
+
+def label_clusters(x, y, link_distance=LINK_DISTANCE):
+    """
+    Return a cluster label per particle (smallest member index of its cluster).
+    """
+    i, j = neighbour_pairs(x, y, link_distance)
+    return _connected_components(len(x), i, j)
+
+
+def count_clusters(x, y, link_distance=LINK_DISTANCE, min_size=2):
+    """
+    Number of clusters with at least min_size members.
+    """
+    if len(x) == 0:
+        return 0
+    sizes = np.bincount(label_clusters(x, y, link_distance))
+    return int(np.count_nonzero(sizes >= min_size))
@@ -0,0 +1,137 @@
+from collections import OrderedDict
+import numpy as np
+
+# -----------------------------------------------------------------------------
+# Tabulated radial force laws
+# -----------------------------------------------------------------------------
+# Purpose:
+#   Replace per-pair transcendental maths (powers, exponentials) with a table
+#   lookup when a force depends only on distance and its constants don't
+#   change during a run.
+#
+# Details:
+#   - The table stores g(s) = F(r) / r as a function of s = r², so the pair
+#     force is simply g(s) * (dx, dy) and no square root is needed: table
+#     pair_scales are marked as taking r² and the pair kernels then pass
+#     dx² + dy² directly (see forces.py, tiling.pair_distance).
+#   - Forces like 1/r^1.75 change fastest at small r, so sampling s uniformly
+#     would waste samples far away. Instead s is split into octaves
+#     [2^e, 2^(e+1)) with the same number of uniform samples in each; np.frexp
+#     gives the octave and the position inside it without any logarithm.
+#   - Values are linearly interpolated. The sample count per octave is doubled
+#     until the interpolation error at every midpoint is within tolerance
+#     (relative to the largest |g| in that octave).
+#   - Outside [r_min, r_max) the table is not used: below r_min the force is
+#     zero (same distance < 1 cutoff as the force models), beyond r_max the
+#     exact law is evaluated for the few pairs that far apart.
+#   - Tables are cached by a key built from the model's constants, so a table
+#     is only rebuilt when those constants change.
+# -----------------------------------------------------------------------------
+MIN_SAMPLES = 16
+MAX_SAMPLES = 1 << 16
+CACHE_SIZE = 16
+
+_cache = OrderedDict()
+
+
+class Radial_Force_Table:
+    def __init__(self, magnitude, r_min=1.0, r_max=4096.0, tolerance=1e-4):
+        """
+        magnitude(r) -> F(r) for an array r; positive attracts, negative repels.
+        """
+        self.magnitude = magnitude
+        self.r_min = r_min
+        self.r_max = r_max
+        self.tolerance = tolerance
+        self.s_min = r_min * r_min
+        self.s_max = r_max * r_max
+        # np.frexp: s = m * 2**e with m in [0.5, 1)
+        self._first_exponent = int(np.frexp(self.s_min)[1])
+        self.octaves = int(np.frexp(self.s_max)[1]) - self._first_exponent + 1
+        self._build()
+
+    def _g(self, s):
+        r = np.sqrt(s)
+        return self.magnitude(r) / r
+
+    def _build(self):
+        exponents = np.arange(self.octaves) + self._first_exponent
+        octave_start = 0.5 * 2.0 ** exponents  # s at m = 0.5
+        samples = MIN_SAMPLES
+        while True:
+            t = np.linspace(0.0, 1.0, samples + 1)
+            s = octave_start[:, None] * (1.0 + t[None, :])
+            with np.errstate(divide="ignore", invalid="ignore"):
+                table = self._g(s)
+                middle = octave_start[:, None] * (1.0 + (t[:-1] + t[1:])[None, :] / 2)
+                exact = self._g(middle)
+                interpolated = (table[:, :-1] + table[:, 1:]) / 2
+                # Relative to the largest |g| in the octave, so laws that cross
+                # zero (attractive at one range, repulsive at another) converge.
+                scale = np.nanmax(np.abs(table), axis=1, keepdims=True)
+                error = np.abs(interpolated - exact) / np.maximum(scale, 1e-300)
+            # Only the part of the first octave at or above s_min matters.
+            error[~(middle >= self.s_min)] = 0.0
+            if np.nanmax(error) <= self.tolerance or samples >= MAX_SAMPLES:
+                break
+            samples *= 2
+        self.samples = samples
+        self.table = np.nan_to_num(table)
+        self.max_error = float(np.nanmax(error))
+
+        # Lookup form: one row of (value, slope) per octave, plus an all-zero
+        # row either side so out-of-range s needs no clipping of the index.
+        rows = np.zeros((self.octaves + 2, samples))
+        self._value = rows.copy()
+        self._value[1:-1] = self.table[:, :-1]
+        self._slope = rows
+        self._slope[1:-1] = np.diff(self.table, axis=1)
+        self._value = self._value.ravel()
+        self._slope = self._slope.ravel()
+        # s_min may fall inside its octave; then values below it must be masked.
+        self._mask_below = self.s_min != 0.5 * 2.0 ** self._first_exponent
+
+    def __call__(self, s):
+        """
+        g(s) = F(r) / r for squared distances s.
+        """
+        s = np.asarray(s, dtype=float)
+        if s.ndim == 0:
+            return self(s[None])[0]
+        mantissa, exponent = np.frexp(s)
+        exponent -= self._first_exponent - 1
+        np.clip(exponent, 0, self.octaves + 1, out=exponent)
+        # mantissa is in [0.5, 1), so position is in [0, samples).
+        position = mantissa
+        position *= 2 * self.samples
+        position -= self.samples
+        index = position.astype(np.intp)
+        position -= index  # now the fraction between samples
+        index += exponent * self.samples
+        result = self._slope[index]
+        result *= position
+        result += self._value[index]
+
+        if self._mask_below:
+            result[s < self.s_min] = 0.0
+        far = s >= self.s_max
+        if far.any():
+            with np.errstate(divide="ignore", invalid="ignore"):
+                result[far] = self._g(s[far])
+        return result
+
+
+def cached_table(key, magnitude, r_min=1.0, r_max=4096.0, tolerance=1e-4):
+    """
+    Table for key (a hashable tuple of the law's constants), built on first use.
+    """
+    cache_key = (key, r_min, r_max, tolerance)
+    table = _cache.get(cache_key)
+    if table is None:
+        table = Radial_Force_Table(magnitude, r_min, r_max, tolerance)
+        _cache[cache_key] = table
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    else:
+        _cache.move_to_end(cache_key)
+    return table
@@ -1,10 +1,282 @@
 import pygame
 import math
+import numpy as np
 from pygame import Vector2
+from barnes_hut import Barnes_Hut_Tree
+from cell_list import neighbour_pairs
+from tiling import (tiled_net_force, block_net_force, default_workers, minimum_image, pair_distance,
+                    PARALLEL_MIN_PARTICLES)
+from force_tables import cached_table
+from particle_mesh import Particle_Mesh, short_range_fraction, CELL_SIZE, SHORT_RANGE_CELLS
+
+# -----------------------------------------------------------------------------
+# Batched pairwise evaluation
+# -----------------------------------------------------------------------------
+# _pairwise_net_force(x, y, pair_scale) -> (net_x, net_y)
+#
+# Evaluates every unordered pair (i, j) with i < j exactly once and uses
+# Newton's third law to give the equal and opposite force to j.
+#
+# Details:
+#   - pair_scale(distance, rows, cols):
+#       Supplied by the force model. Returns an array s shaped like distance so
+#       that the force on i due to j is s * (x[j] - x[i], y[j] - y[i]).
+#       rows/cols are slices into the arrays the model was called with. For
+#       pair lists (1-D distance) they are index arrays, one entry per pair;
+#       _pair_product handles both cases.
+#   - A pair_scale marked with _squared (table lookups, see force_tables.py)
+#     is called with r² instead of r, so the kernels skip the square root
+#     (tiling.pair_distance). Sums of several pair_scales take r² only if
+#     every term does (_sum_input).
+#   - Pairs closer than 1 pixel contribute nothing (same cutoff as
+#     calculate_force).
+#   - Work is done in row blocks so memory stays bounded for large scenes.
+#   - period = (width, height) measures every separation to the nearest
+#     periodic copy (tiling.minimum_image); all the kernels below take it.
+# -----------------------------------------------------------------------------
+BLOCK_PAIRS = 1 << 20
+
+
+def _pairwise_net_force(x, y, pair_scale, period=None):
+    n = len(x)
+    net_x = np.zeros(n)
+    net_y = np.zeros(n)
+    if n < 2:
+        return net_x, net_y
+
+    rows_per_block = max(1, BLOCK_PAIRS // n)
+    for start in range(0, n - 1, rows_per_block):
+        stop = min(start + rows_per_block, n - 1)
+        rows, cols = slice(start, stop), slice(start, n)
+
+        dx = x[cols][None, :] - x[rows][:, None]
+        dy = y[cols][None, :] - y[rows][:, None]
+        minimum_image(dx, dy, period)
+        distance = pair_distance(dx, dy, pair_scale)
+
+        # Upper triangle only, so each pair is computed once.
+        upper = np.arange(start, n)[None, :] > np.arange(start, stop)[:, None]
+        keep = upper & (distance >= 1)
+
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            scale = np.where(keep, pair_scale(distance, rows, cols), 0.0)
+
+        fx = scale * dx
+        fy = scale * dy
+        net_x[rows] += fx.sum(axis=1)
+        net_y[rows] += fy.sum(axis=1)
+        net_x[cols] -= fx.sum(axis=0)
+        net_y[cols] -= fy.sum(axis=0)
+
+    return net_x, net_y
+
+
+def _direct_net_force(x, y, pair_scale, workers, period=None):
+    # Large scenes go to the tiled multi-core path (see tiling.py), also with
+    # one worker, so the sums do not depend on the worker count.
+    workers = default_workers() if workers is None else workers
+    if len(x) >= PARALLEL_MIN_PARTICLES:
+        return tiled_net_force(x, y, pair_scale, workers, period)
+    return _pairwise_net_force(x, y, pair_scale, period)
+
+
+# -----------------------------------------------------------------------------
+# _targets_net_force(x, y, targets, pair_scale) -> (net_x, net_y)
+# -----------------------------------------------------------------------------
+# Net force on a subset of particles only (e.g. the particles an adaptive
+# integrator is about to kick), from every other particle. Costs
+# O(len(targets) * N) instead of O(N²). pair_scale(distance, rows, cols)
+# receives an index array for rows and a slice for cols. Entries that are not
+# targets are left at zero.
+# -----------------------------------------------------------------------------
+def _targets_net_force(x, y, targets, pair_scale, period=None):
+    n = len(x)
+    net_x = np.zeros(n)
+    net_y = np.zeros(n)
+    if n < 2 or len(targets) == 0:
+        return net_x, net_y
+
+    rows_per_block = max(1, BLOCK_PAIRS // n)
+    for start in range(0, len(targets), rows_per_block):
+        rows = targets[start:start + rows_per_block]
+        dx = x[None, :] - x[rows][:, None]
+        dy = y[None, :] - y[rows][:, None]
+        minimum_image(dx, dy, period)
+        distance = pair_distance(dx, dy, pair_scale)
+        keep = (distance >= 1) & (np.arange(n)[None, :] != rows[:, None])
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            scale = np.where(keep, pair_scale(distance, rows, slice(None)), 0.0)
+        net_x[rows] = (scale * dx).sum(axis=1)
+        net_y[rows] = (scale * dy).sum(axis=1)
+
+    return net_x, net_y
+
+
+# -----------------------------------------------------------------------------
+# _sources_net_force(x, y, sources, pair_scale) -> (net_x, net_y)
+# -----------------------------------------------------------------------------
+# The other way round: net force on every particle from a subset of sources
+# only, e.g. the particles that moved since forces were last cached (see
+# sleeping.py). Also O(len(sources) * N). Each source is a row; by Newton's
+# third law the force on column j is minus the force on the source.
+# -----------------------------------------------------------------------------
+def _sources_net_force(x, y, sources, pair_scale, period=None):
+    n = len(x)
+    net_x = np.zeros(n)
+    net_y = np.zeros(n)
+    if n < 2 or len(sources) == 0:
+        return net_x, net_y
+
+    rows_per_block = max(1, BLOCK_PAIRS // n)
+    for start in range(0, len(sources), rows_per_block):
+        rows = sources[start:start + rows_per_block]
+        dx = x[None, :] - x[rows][:, None]
+        dy = y[None, :] - y[rows][:, None]
+        minimum_image(dx, dy, period)
+        distance = pair_distance(dx, dy, pair_scale)
+        keep = (distance >= 1) & (np.arange(n)[None, :] != rows[:, None])
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            scale = np.where(keep, pair_scale(distance, rows, slice(None)), 0.0)
+        net_x -= (scale * dx).sum(axis=0)
+        net_y -= (scale * dy).sum(axis=0)
+
+    return net_x, net_y
+
+
+def _local_targets(active, targets):
+    """
+    Positions within the active subset of the global indices in targets,
+    dropping targets that are not active.
+    """
+    targets = np.asarray(targets, dtype=np.int64)
+    location = np.searchsorted(active, targets)
+    found = location < len(active)
+    found[found] = active[location[found]] == targets[found]
+    return location[found]
+
+
+# -----------------------------------------------------------------------------
+# _pair_list_net_force(x, y, i, j, pair_scale) -> (net_x, net_y)
+# -----------------------------------------------------------------------------
+# Same idea as _pairwise_net_force, but only for an explicit list of pairs
+# (e.g. from cell_list.neighbour_pairs). pair_scale(distance, i, j) receives
+# index arrays rather than slices.
+# -----------------------------------------------------------------------------
+def _pair_list_net_force(x, y, i, j, pair_scale, period=None):
+    n = len(x)
+    dx = x[j] - x[i]
+    dy = y[j] - y[i]
+    minimum_image(dx, dy, period)
+    distance = pair_distance(dx, dy, pair_scale)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        scale = np.where(distance >= 1, pair_scale(distance, i, j), 0.0)
+    fx = scale * dx
+    fy = scale * dy
+    net_x = np.bincount(i, fx, minlength=n) - np.bincount(j, fx, minlength=n)
+    net_y = np.bincount(i, fy, minlength=n) - np.bincount(j, fy, minlength=n)
+    return net_x, net_y
+
+
+def _pair_product(values, distance, rows, cols):
+    # values[i] * values[j] for the pairs a pair_scale is called with.
+    if distance.ndim == 1:
+        return values[rows] * values[cols]
+    return values[rows, None] * values[None, cols]
+
+
+def _weighted(pair_scale, count):
+    """
+    pair_scale for composite bodies standing in for count particles each
+    (see coarsening.py): the pair force is count[i] * count[j] times larger.
+    """
+    if count is None:
+        return pair_scale
+    count = np.asarray(count, dtype=float)
+    single = count == 1
+    if single.all():
+        return pair_scale
+
+    def weighted(distance, rows, cols):
+        scale = pair_scale(distance, rows, cols)
+        if single[rows].all() and single[cols].all():
+            # Plain particles only (most tiles): nothing to weight.
+            return scale
+        return scale * _pair_product(count, distance, rows, cols)
+    weighted.squared = _takes_squared(pair_scale)
+    return weighted
+
+
+def _squared(pair_scale):
+    # Mark a pair_scale that takes squared distances (see the header above).
+    pair_scale.squared = True
+    return pair_scale
+
+
+def _takes_squared(pair_scale):
+    return getattr(pair_scale, "squared", False)
+
+
+def _sum_input(scales):
+    """
+    (terms, squared) for a sum of pair_scales: the sum takes squared
+    distances only if every term does; otherwise terms that do are wrapped to
+    take plain distances.
+    """
+    if all(_takes_squared(scale) for scale in scales):
+        return list(scales), True
+    return [_unsquared(scale) for scale in scales], False
+
+
+def _unsquared(pair_scale):
+    if not _takes_squared(pair_scale):
+        return pair_scale
+
+    def from_distance(distance, rows, cols):
+        return pair_scale(distance * distance, rows, cols)
+    return from_distance
+
+
+def _only_targets(net_x, net_y, targets):
+    # Backends that always compute every particle still honour targets.
+    if targets is None:
+        return net_x, net_y
+    keep = np.zeros(len(net_x), dtype=bool)
+    keep[targets] = True
+    return np.where(keep, net_x, 0.0), np.where(keep, net_y, 0.0)
+
+
+def _to_arrays(particle, *keys):
+    return tuple(np.fromiter((p[key] for p in particle), dtype=float, count=len(particle)) for key in keys)
+
 
 class Electromagnetic_force:
-    def __init__(self, COLOUMBS_CONSTANT=70):
+    # -------------------------------------------------------------------------
+    # Modes for calculate_net_force / calculate_net_force_arrays:
+    #   - "direct":     exact sum over every charged pair, O(N²).
+    #   - "barnes_hut": quadtree approximation, O(N log N). theta is the
+    #                   opening angle (0 = exact, larger = faster, less accurate).
+    #   - "particle_mesh": grid solver with FFTs, ~O(N + G log G) (see
+    #                   particle_mesh.py). mesh_cell is the cell size in pixels;
+    #                   pairs closer than mesh_short_range cells are corrected
+    #                   with an exact direct sum (0 = mesh only). The last
+    #                   solve is kept in self.mesh for the field overlay.
+    #
+    # workers:
+    #   Threads for the direct all-pairs sum on large scenes (None = all cores,
+    #   1 = single-threaded).
+    # -------------------------------------------------------------------------
+    MODES = ("direct", "barnes_hut", "particle_mesh")
+
+    def __init__(self, COLOUMBS_CONSTANT=70, mode="direct", theta=0.5, leaf_size=8, workers=None,
+                 mesh_cell=CELL_SIZE, mesh_short_range=SHORT_RANGE_CELLS):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown Electromagnetic_force mode: {mode!r}")
         self.COLOUMBS_CONSTANT = COLOUMBS_CONSTANT
+        self.mode = mode
+        self.theta = theta
+        self.leaf_size = leaf_size
+        self.workers = workers
+        self.mesh = Particle_Mesh(mesh_cell, mesh_short_range)
 
     def calculate_force(self, p1, p2):
         r_vec = pygame.math.Vector2(p2['x'], p2['y']) - pygame.math.Vector2(p1['x'], p1['y'])
@@ -17,23 +289,160 @@ class Electromagnetic_force:
         return (force.x, force.y)
 
     def calculate_net_force(self, particle):
-        forces = []
-        for i, p1 in enumerate(particle):
-            net_force = pygame.math.Vector2(0, 0)
-            for j, p2 in enumerate(particle):
-                if i != j and p1['charge'] !=0 and p2['charge'] != 0 :
-                    fx, fy = self.calculate_force(p1, p2)
-                    net_force += pygame.math.Vector2(fx, fy)
-            forces.append((net_force.x, net_force.y))
-        return forces
+        x, y, charge = _to_arrays(particle, 'x', 'y', 'charge')
+        net_x, net_y = self.calculate_net_force_arrays(x, y, charge)
+        return list(zip(net_x.tolist(), net_y.tolist()))
+
+    def eligible(self, charge, mass):
+        """
+        Particles that feel and exert the force: everything with a charge.
+        """
+        return np.asarray(charge) != 0
+
+    def pair_scale(self, charge, mass, count=None):
+        """
+        pair_scale(distance, rows, cols) for particles with these properties
+        (see _pairwise_net_force). Composite bodies already carry their summed
+        charge, so count is not needed.
+        """
+        q = np.asarray(charge, dtype=float)
+
+        def pair_scale(distance, rows, cols):
+            return -(self.COLOUMBS_CONSTANT * _pair_product(q, distance, rows, cols)) / distance ** 3
+        return pair_scale
+
+    def calculate_net_force_arrays(self, x, y, charge, targets=None):
+        """
+        Net Coulomb force on every particle from position and charge arrays.
+        Neutral particles neither feel nor exert the force.
+        With targets (an index array) only those particles' forces are computed;
+        the other entries are zero.
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        charge = np.asarray(charge, dtype=float)
+
+        net_x = np.zeros(len(x))
+        net_y = np.zeros(len(x))
+        active = np.flatnonzero(self.eligible(charge, None))
+        q = charge[active]
+        pair_scale = self.pair_scale(q, None)
+
+        if self.mode == "barnes_hut":
+            tree = Barnes_Hut_Tree(x[active], y[active], q, leaf_size=self.leaf_size)
+            net_x[active], net_y[active] = tree.net_force(self.COLOUMBS_CONSTANT, self.theta)
+        elif self.mode == "particle_mesh":
+            net_x[active], net_y[active] = self._mesh_net_force(x[active], y[active], q, pair_scale)
+        elif targets is not None:
+            local = _local_targets(active, targets)
+            net_x[active], net_y[active] = _targets_net_force(x[active], y[active], local, pair_scale)
+        else:
+            net_x[active], net_y[active] = _direct_net_force(x[active], y[active], pair_scale, self.workers)
+        return _only_targets(net_x, net_y, targets)
+
+    def _mesh_net_force(self, x, y, q, pair_scale):
+        net_x, net_y = self.mesh.net_force(x, y, q, self.COLOUMBS_CONSTANT)
+        cutoff = self.mesh.cutoff
+        if cutoff > 0:
+            def short_range(distance, i, j):
+                return pair_scale(distance, i, j) * short_range_fraction(distance, cutoff)
+            i, j = neighbour_pairs(x, y, cutoff)
+            near_x, near_y = _pair_list_net_force(x, y, i, j, short_range)
+            net_x += near_x
+            net_y += near_y
+        return net_x, net_y
 
 class strong_nuclear_force:
-    def __init__(self, H_BAR=1e10, E=3, COUPLING_CONSTANT=25, SPEED_OF_LIGHT=3000, MASS_CHARGED_PION=2.4e-28):
+    # -------------------------------------------------------------------------
+    # Modes for calculate_net_force / calculate_net_force_arrays:
+    #   - "direct":    exact sum over every baryon pair, O(N²).
+    #   - "cell_list": only pairs closer than interaction_cutoff() are
+    #                  evaluated, found with a uniform grid, ~O(N).
+    #
+    # cutoff:
+    #   Explicit interaction radius in pixels. When None it is derived from the
+    #   constants as the distance where the force magnitude drops to tolerance.
+    #
+    # workers:
+    #   Threads for the direct all-pairs sum on large scenes (None = all cores,
+    #   1 = single-threaded).
+    #
+    # use_table:
+    #   Look the force up in a cached table indexed by r² (see force_tables.py)
+    #   instead of evaluating the two powers per pair. table_tolerance is the
+    #   relative interpolation error bound.
+    # -------------------------------------------------------------------------
+    MODES = ("direct", "cell_list")
+
+    def __init__(self, H_BAR=1e10, E=3, COUPLING_CONSTANT=25, SPEED_OF_LIGHT=3000, MASS_CHARGED_PION=2.4e-28,
+                 mode="direct", cutoff=None, tolerance=1e-3, workers=None, use_table=False, table_tolerance=1e-4):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown strong_nuclear_force mode: {mode!r}")
         self.H_BAR = H_BAR
         self.E = E
         self.COUPLING_CONSTANT = COUPLING_CONSTANT
         self.SPEED_OF_LIGHT = SPEED_OF_LIGHT
         self.MASS_CHARGED_PION = MASS_CHARGED_PION
+        self.mode = mode
+        self.cutoff = cutoff
+        self.tolerance = tolerance
+        self.workers = workers
+        self.use_table = use_table
+        self.table_tolerance = table_tolerance
+
+    def force_magnitude(self, distance):
+        inverse_range = self.MASS_CHARGED_PION * self.SPEED_OF_LIGHT / self.H_BAR
+        return self.COUPLING_CONSTANT * (float(self.E) ** -(inverse_range * distance)) / distance ** 1.75
+
+    def force_table(self):
+        """
+        Cached lookup table for the current constants; rebuilt only when they change.
+        """
+        key = ("strong_nuclear_force", self.H_BAR, self.E, self.COUPLING_CONSTANT,
+               self.SPEED_OF_LIGHT, self.MASS_CHARGED_PION)
+        return cached_table(key, self.force_magnitude, tolerance=self.table_tolerance)
+
+    def eligible(self, charge, mass):
+        """
+        Particles that feel and exert the force: baryons, i.e. not electrons
+        (mass 0.05) or neutrinos (mass 0).
+        """
+        mass = np.asarray(mass)
+        return (mass != 0.05) & (mass != 0)
+
+    def pair_scale(self, charge, mass, count=None):
+        """
+        pair_scale(distance, rows, cols) for the pair kernels; the force only
+        depends on distance (times count[i] * count[j] for composite bodies).
+        """
+        if self.use_table:
+            table = self.force_table()
+
+            @_squared
+            def pair_scale(squared_distance, rows, cols):
+                return table(squared_distance)
+        else:
+            def pair_scale(distance, rows, cols):
+                return self.force_magnitude(distance) / distance
+        return _weighted(pair_scale, count)
+
+    def interaction_cutoff(self):
+        """
+        Distance beyond which the force magnitude is below self.tolerance.
+        The magnitude falls monotonically, so a bisection is enough.
+        """
+        if self.cutoff is not None:
+            return self.cutoff
+        low, high = 1.0, 2.0
+        while self.force_magnitude(high) > self.tolerance and high < 1e12:
+            low, high = high, high * 2
+        for _ in range(60):
+            middle = (low + high) / 2
+            if self.force_magnitude(middle) > self.tolerance:
+                low = middle
+            else:
+                high = middle
+        return high
 
     def calculate_force(self, p1, p2):
         r_vec = pygame.math.Vector2(p2['x'], p2['y']) - pygame.math.Vector2(p1['x'], p1['y'])
@@ -47,12 +456,273 @@ class strong_nuclear_force:
         return (force.x, force.y)
 
     def calculate_net_force(self, particle):
-        forces = []
-        for i, p1 in enumerate(particle):
-            net_force = pygame.math.Vector2(0, 0)
-            for j, p2 in enumerate(particle):
-                if i != j and (p1['mass'] != 0.05 and p2['mass'] != 0.05) and (p1['mass'] !=0 and p2['mass'] != 0) :
-                    fx, fy = self.calculate_force(p1, p2)
-                    net_force += pygame.math.Vector2(fx, fy)
-            forces.append((net_force.x, net_force.y))
-        return forces
+        x, y, mass = _to_arrays(particle, 'x', 'y', 'mass')
+        net_x, net_y = self.calculate_net_force_arrays(x, y, mass)
+        return list(zip(net_x.tolist(), net_y.tolist()))
+
+    def calculate_net_force_arrays(self, x, y, mass, targets=None):
+        """
+        Net strong force on every particle from position and mass arrays.
+        Electrons (mass 0.05) and neutrinos (mass 0) are excluded.
+        With targets (an index array) only those particles' forces are computed;
+        the other entries are zero.
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        mass = np.asarray(mass, dtype=float)
+
+        net_x = np.zeros(len(x))
+        net_y = np.zeros(len(x))
+        active = np.flatnonzero(self.eligible(None, mass))
+        ax, ay = x[active], y[active]
+        pair_scale = self.pair_scale(None, mass[active])
+
+        if self.mode == "cell_list":
+            i, j = neighbour_pairs(ax, ay, self.interaction_cutoff())
+            net_x[active], net_y[active] = _pair_list_net_force(ax, ay, i, j, pair_scale)
+        elif targets is not None:
+            local = _local_targets(active, targets)
+            net_x[active], net_y[active] = _targets_net_force(ax, ay, local, pair_scale)
+        else:
+            net_x[active], net_y[active] = _direct_net_force(ax, ay, pair_scale, self.workers)
+        return _only_targets(net_x, net_y, targets)
+
+
+class Radial_force:
+    """
+    User-defined central force between particles, looked up from a cached table.
+    - magnitude(r) -> F(r) for an array of distances; positive attracts, negative repels
+    - applies_to(charge, mass) -> bool array choosing which particles feel and
+      exert the force (default: all of them)
+    - constants: values magnitude depends on, so the table is rebuilt when they change
+    """
+    def __init__(self, magnitude, applies_to=None, constants=(), r_max=4096.0, tolerance=1e-4, workers=None):
+        self.magnitude = magnitude
+        self.applies_to = applies_to
+        self.constants = tuple(constants)
+        self.r_max = r_max
+        self.tolerance = tolerance
+        self.workers = workers
+
+    def force_table(self):
+        key = ("Radial_force", self.magnitude, self.constants)
+        return cached_table(key, self.magnitude, r_max=self.r_max, tolerance=self.tolerance)
+
+    def eligible(self, charge, mass):
+        if self.applies_to is None:
+            return np.ones(len(mass), dtype=bool)
+        return np.asarray(self.applies_to(charge, mass), dtype=bool)
+
+    def pair_scale(self, charge, mass, count=None):
+        table = self.force_table()
+
+        @_squared
+        def pair_scale(squared_distance, rows, cols):
+            return table(squared_distance)
+        return _weighted(pair_scale, count)
+
+    def calculate_net_force_arrays(self, x, y, charge, mass, targets=None):
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        charge = np.asarray(charge, dtype=float)
+        mass = np.asarray(mass, dtype=float)
+
+        net_x = np.zeros(len(x))
+        net_y = np.zeros(len(x))
+        active = np.flatnonzero(self.eligible(charge, mass))
+        pair_scale = self.pair_scale(charge[active], mass[active])
+
+        if targets is not None:
+            local = _local_targets(active, targets)
+            net_x[active], net_y[active] = _targets_net_force(x[active], y[active], local, pair_scale)
+        else:
+            net_x[active], net_y[active] = _direct_net_force(x[active], y[active], pair_scale, self.workers)
+        return _only_targets(net_x, net_y, targets)
+
+
+# -----------------------------------------------------------------------------
+# Force_Field
+# -----------------------------------------------------------------------------
+# Purpose:
+#   Evaluate several force models in one sweep over the particle pairs instead
+#   of one full O(N²) pass per model.
+#
+# Details:
+#   - Each model provides eligible(charge, mass) -> bool array and
+#     pair_scale(charge, mass, count) -> pair_scale(distance, rows, cols), the
+#     same pieces its own calculate_net_force_arrays is built from. count is
+#     an optional number of particles per body (composite bodies, see
+#     coarsening.py); only the fused pass and pair_list_net_force honour it.
+#   - Particles are grouped by which models they are eligible for (e.g.
+#     protons: EM + strong, electrons: EM, neutrons: strong) and sorted so
+#     each group is contiguous. Every pair of groups is one block whose
+#     pair_scale sums just the models the two groups share, so the geometry
+#     (dx, dy, distance) of each pair is computed once, no per-pair masks are
+#     needed, and pairs with no common model (electron-neutron) are skipped.
+#   - Blocks are evaluated tile by tile with tiling.block_net_force.
+#   - With targets (force on a subset) or sources (force from a subset), the
+#     rows are that subset only and the models are masked per pair instead
+#     (O(len(subset) * N), so the masks are cheap). sources needs every model
+#     in direct mode.
+#   - Models in an approximate mode (Electromagnetic_force "barnes_hut" or
+#     "particle_mesh", strong_nuclear_force "cell_list") don't walk all
+#     pairs, so they keep their own algorithm and are added on afterwards.
+#   - period = (width, height) makes the domain periodic: every pair
+#     interacts through its minimum image (see boundaries.py). Like sources,
+#     it needs every model in direct mode.
+# -----------------------------------------------------------------------------
+class Force_Field:
+    """
+    A fixed set of force models evaluated together.
+    - models: Electromagnetic_force, strong_nuclear_force, Radial_force, ...
+    - workers: threads for the fused all-pairs sum (None = all cores)
+    - period: None, or (width, height) of a periodic domain
+    """
+    def __init__(self, models=(), workers=None, period=None):
+        self.models = list(models)
+        self.workers = workers
+        self.period = period
+
+    def add(self, model):
+        self.models.append(model)
+
+    def _fused(self, model):
+        return getattr(model, "mode", "direct") == "direct"
+
+    def all_direct(self):
+        return all(self._fused(model) for model in self.models)
+
+    def interacting(self, charge, mass):
+        """
+        Bool per particle: at least one model applies to it (a non-zero
+        eligibility signature). The others, e.g. neutrinos, feel no force.
+        """
+        interacting = np.zeros(len(charge), dtype=bool)
+        for model in self.models:
+            interacting |= model.eligible(charge, mass)
+        return interacting
+
+    def calculate_net_force_arrays(self, x, y, charge, mass, targets=None, count=None, sources=None):
+        """
+        Net force from every model on every particle (or only on targets; the
+        other entries are zero). With sources (an index array) only the
+        force exerted by those particles is included.
+        """
+        if sources is not None and not self.all_direct():
+            raise ValueError("Force_Field sources need every model in direct mode")
+        if self.period is not None and not self.all_direct():
+            raise ValueError("Periodic Force_Field needs every model in direct mode")
+        period = self.period
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        charge = np.asarray(charge, dtype=float)
+        mass = np.asarray(mass, dtype=float)
+
+        net_x = np.zeros(len(x))
+        net_y = np.zeros(len(x))
+        fused = [model for model in self.models if self._fused(model)]
+        if fused:
+            # Bit k of a particle's signature is set if model k applies to it.
+            signature = np.zeros(len(x), dtype=np.int64)
+            for k, model in enumerate(fused):
+                signature |= model.eligible(charge, mass).astype(np.int64) << k
+            active = np.flatnonzero(signature)
+            active = active[np.argsort(signature[active], kind="stable")]
+            body_count = None if count is None else np.asarray(count, dtype=float)[active]
+            scales = [model.pair_scale(charge[active], mass[active], body_count) for model in fused]
+            ax, ay = x[active], y[active]
+            if targets is not None or sources is not None:
+                # Position of each eligible target/source within active.
+                position = np.full(len(x), -1)
+                position[active] = np.arange(len(active))
+                rows = position[np.asarray(targets if targets is not None else sources, dtype=np.int64)]
+                rows = rows[rows >= 0]
+                pair_scale = self._masked_pair_scale(signature[active], scales)
+                if targets is not None:
+                    force = _targets_net_force(ax, ay, rows, pair_scale, period)
+                else:
+                    force = _sources_net_force(ax, ay, rows, pair_scale, period)
+            else:
+                force = self._grouped_force(ax, ay, signature[active], scales)
+            net_x[active], net_y[active] = force
+
+        for model in self.models:
+            if self._fused(model):
+                continue
+            if isinstance(model, Electromagnetic_force):
+                model_x, model_y = model.calculate_net_force_arrays(x, y, charge, targets=targets)
+            elif isinstance(model, strong_nuclear_force):
+                model_x, model_y = model.calculate_net_force_arrays(x, y, mass, targets=targets)
+            else:
+                model_x, model_y = model.calculate_net_force_arrays(x, y, charge, mass, targets=targets)
+            net_x += model_x
+            net_y += model_y
+        return _only_targets(net_x, net_y, targets)
+
+    def pair_list_net_force(self, x, y, charge, mass, i, j):
+        """
+        Net force from every model over an explicit list of pairs (i, j),
+        e.g. the pairs inside each nucleus. Each pair counts once.
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        charge = np.asarray(charge, dtype=float)
+        mass = np.asarray(mass, dtype=float)
+        scales, squared = _sum_input([model.pair_scale(charge, mass) for model in self.models])
+        terms = [(scale, model.eligible(charge, mass)) for scale, model in zip(scales, self.models)]
+
+        def pair_scale(distance, i, j):
+            total = np.zeros_like(distance)
+            for scale, eligible in terms:
+                total += np.where(eligible[i] & eligible[j], scale(distance, i, j), 0.0)
+            return total
+        pair_scale.squared = squared
+
+        return _pair_list_net_force(x, y, i, j, pair_scale, self.period)
+
+    def _grouped_force(self, x, y, signature, scales):
+        codes, starts = np.unique(signature, return_index=True)
+        stops = np.append(starts[1:], len(signature))
+        blocks = []
+        for a in range(len(codes)):
+            for b in range(a, len(codes)):
+                shared = [scales[k] for k in range(len(scales)) if (codes[a] & codes[b]) >> k & 1]
+                if shared:
+                    blocks.append((starts[a], stops[a], starts[b], stops[b], _sum_pair_scales(shared)))
+        workers = default_workers() if self.workers is None else self.workers
+        if len(x) < PARALLEL_MIN_PARTICLES:
+            workers = 1
+        return block_net_force(x, y, blocks, workers, self.period)
+
+    def _masked_pair_scale(self, signature, scales):
+        scales, squared = _sum_input(scales)
+        weights = []
+        for k in range(len(scales)):
+            applies = (signature >> k & 1).astype(float)
+            weights.append(None if applies.all() else applies)
+
+        def pair_scale(distance, rows, cols):
+            total = None
+            for scale, weight in zip(scales, weights):
+                term = scale(distance, rows, cols)
+                if weight is not None:
+                    term *= weight[rows][:, None]
+                    term *= weight[cols][None, :]
+                total = term if total is None else total + term
+            return total
+        pair_scale.squared = squared
+        return pair_scale
+
+
+def _sum_pair_scales(scales):
+    if len(scales) == 1:
+        return scales[0]
+    scales, squared = _sum_input(scales)
+
+    def pair_scale(distance, rows, cols):
+        total = scales[0](distance, rows, cols)
+        for scale in scales[1:]:
+            total += scale(distance, rows, cols)
+        return total
+    pair_scale.squared = squared
+    return pair_scale
@@ -0,0 +1,119 @@
+import csv
+import json
+import time
+import numpy as np
+import pygame
+
+# -----------------------------------------------------------------------------
+# Per-frame phase timing
+# -----------------------------------------------------------------------------
+# Purpose:
+#   Show where the time of each frame goes (physics, rendering, UI, notes
+#   text, event handling, presenting) when the app slows down.
+#
+# Usage in the main loop:
+#   frame_timer.begin_frame()
+#   ... draw particles ...        frame_timer.mark("render")
+#   ... step simulation ...       frame_timer.mark("physics")
+#   frame_timer.end_frame(len(particles))
+#
+# Details:
+#   - mark(phase) adds the time since the previous mark to that phase, so a
+#     phase can be marked more than once per frame.
+#   - Samples go into a fixed-size ring buffer (capacity frames x phases).
+#   - Frames are always recorded (a few perf_counter calls per frame), so a
+#     dump has data even if the HUD was never shown; enabled only controls
+#     whether the HUD is drawn.
+# -----------------------------------------------------------------------------
+PHASES = ("render", "ui", "notes", "physics", "events", "present")
+
+
+class Frame_Timer:
+    def __init__(self, phases=PHASES, capacity=600):
+        self.phases = tuple(phases)
+        self._column = {phase: i for i, phase in enumerate(self.phases)}
+        self.capacity = capacity
+        self.samples = np.zeros((capacity, len(self.phases)))
+        self.particle_counts = np.zeros(capacity, dtype=np.int64)
+        self.frames = 0
+        self.enabled = False
+        self._current = np.zeros(len(self.phases))
+        self._last = 0.0
+
+    def toggle(self):
+        self.enabled = not self.enabled
+
+    # ----- Recording -----
+    def begin_frame(self):
+        self._current[:] = 0
+        self._last = time.perf_counter()
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self._current[self._column[phase]] += now - self._last
+        self._last = now
+
+    def end_frame(self, particle_count=0):
+        row = self.frames % self.capacity
+        self.samples[row] = self._current
+        self.particle_counts[row] = particle_count
+        self.frames += 1
+
+    # ----- Reporting -----
+    def recent(self):
+        """
+        Samples in the buffer in chronological order, in seconds.
+        """
+        if self.frames <= self.capacity:
+            return self.samples[:self.frames], self.particle_counts[:self.frames]
+        order = np.roll(np.arange(self.capacity), -(self.frames % self.capacity))
+        return self.samples[order], self.particle_counts[order]
+
+    def summary(self):
+        """
+        {phase: (mean ms, p50 ms, p95 ms, p99 ms)} over the buffered frames.
+        """
+        samples, _ = self.recent()
+        if len(samples) == 0:
+            return {}
+        ms = samples * 1000
+        p50, p95, p99 = np.percentile(ms, (50, 95, 99), axis=0)
+        mean = ms.mean(axis=0)
+        return {phase: (mean[i], p50[i], p95[i], p99[i]) for i, phase in enumerate(self.phases)}
+
+    def dump(self, path):
+        """
+        Write the buffered samples (ms per phase per frame) to .csv or .json.
+        """
+        samples, counts = self.recent()
+        rows = [[int(count)] + (sample * 1000).tolist() for sample, count in zip(samples, counts)]
+        if path.endswith(".json"):
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"phases": list(self.phases), "unit": "ms",
+                           "frames": [{"particles": row[0], **dict(zip(self.phases, row[1:]))} for row in rows]},
+                          f, indent=1)
+        else:
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(["particles"] + [f"{phase}_ms" for phase in self.phases])
+                writer.writerows(rows)
+
+    def draw(self, surface, font, fps, particle_count, evicted=None):
+        """
+        Overlay: FPS, particle count (and evictions, if given) and mean/p95
+        milliseconds per phase.
+        """
+        lines = [f"FPS {fps:5.1f}   particles {particle_count}", "phase      mean    p95   (ms)"]
+        if evicted is not None:
+            lines[0] += f"   evicted {evicted}"
+        for phase, (mean, _, p95, _) in self.summary().items():
+            lines.append(f"{phase:<9}{mean:6.2f} {p95:6.2f}")
+
+        line_h = font.get_height() + 2
+        width = max(font.size(line)[0] for line in lines) + 16
+        panel = pygame.Rect(surface.get_width() - width - 10, 110, width, line_h * len(lines) + 12)
+        pygame.draw.rect(surface, (20, 20, 20), panel)
+        pygame.draw.rect(surface, (180, 180, 180), panel, 1)
+        for i, line in enumerate(lines):
+            surface.blit(font.render(line, True, (255, 255, 255)), (panel.x + 8, panel.y + 6 + i * line_h))
+        return panel
@@ -0,0 +1,183 @@
+import numpy as np
+
+# -----------------------------------------------------------------------------
+# Integrators
+# -----------------------------------------------------------------------------
+# Each integrator advances a Simulation by one step through step(simulation),
+# using simulation.compute_forces() for the net force.
+#
+#   - Legacy_Integrator:
+#       The original update: v += F/m, v *= DAMPING, cap at MAX_SPEED,
+#       x += v. No timestep; kept as the default so scenes behave as before.
+#   - Semi_Implicit_Euler:
+#       v += a dt, then x += v dt. One force evaluation per step.
+#   - Velocity_Verlet:
+#       Kick-drift-kick leapfrog. Reuses the previous step's accelerations,
+#       so it also costs one force evaluation per step, but is second order
+#       and time-reversible.
+#   - Block_Timestep:
+#       Leapfrog where each particle has its own power-of-two step
+#       dt_max / 2^k chosen from its acceleration. Close encounters are kicked
+#       often, isolated particles rarely, and forces are only evaluated for
+#       the particles being kicked.
+#
+# Shared options (all but Legacy_Integrator):
+#   - dt:        timestep in frames (1.0 = one legacy step).
+#   - damping:   optional drag rate; v *= exp(-damping * dt). 0 disables it.
+#   - max_speed: speed cap; None (the default) uses simulation.max_speed as
+#                the legacy update does, math.inf disables it.
+#
+# As in the original update, massless particles (neutrinos) get a constant
+# acceleration of (1, 1), so without a cap they speed up without bound.
+# -----------------------------------------------------------------------------
+
+
+def accelerations(fx, fy, mass):
+    massive = mass != 0
+    ax = np.divide(fx, mass, out=np.ones_like(fx), where=massive)
+    ay = np.divide(fy, mass, out=np.ones_like(fy), where=massive)
+    return ax, ay
+
+
+class Legacy_Integrator:
+    def step(self, simulation):
+        fx, fy = simulation.compute_forces()
+        simulation.integrate(fx, fy)
+        simulation.time += 1.0
+
+
+class _Timestep_Integrator:
+    def __init__(self, dt=1.0, damping=0.0, max_speed=None):
+        self.dt = dt
+        self.damping = damping
+        self.max_speed = max_speed
+
+    def _kick(self, simulation, ax, ay, dt, where=None):
+        """
+        v += a dt (optionally only for the particles in where), then drag and cap.
+        dt may be an array with one step per particle in where.
+        """
+        particles = simulation.particles
+        vx, vy = particles.vx, particles.vy
+        if where is None:
+            where = slice(None)
+        drag = np.exp(-self.damping * dt) if self.damping else 1.0
+        vx[where] = (vx[where] + ax[where] * dt) * drag
+        vy[where] = (vy[where] + ay[where] * dt) * drag
+        max_speed = simulation.max_speed if self.max_speed is None else self.max_speed
+        if np.isfinite(max_speed):
+            speed = np.hypot(vx, vy)
+            too_fast = speed > max_speed
+            scale = max_speed / speed[too_fast]
+            vx[too_fast] *= scale
+            vy[too_fast] *= scale
+
+
+class Semi_Implicit_Euler(_Timestep_Integrator):
+    def step(self, simulation):
+        particles = simulation.particles
+        ax, ay = accelerations(*simulation.compute_forces(), particles.mass)
+        self._kick(simulation, ax, ay, self.dt)
+        x, y = particles.x, particles.y
+        x += particles.vx * self.dt
+        y += particles.vy * self.dt
+        simulation.time += self.dt
+
+
+class Velocity_Verlet(_Timestep_Integrator):
+    def __init__(self, dt=1.0, damping=0.0, max_speed=None):
+        super().__init__(dt, damping, max_speed)
+        self._cache = None  # (particle store version, ax, ay)
+
+    def _current_accelerations(self, simulation):
+        particles = simulation.particles
+        if self._cache is not None and self._cache[0] == particles.version:
+            return self._cache[1], self._cache[2]
+        return accelerations(*simulation.compute_forces(), particles.mass)
+
+    def step(self, simulation):
+        particles = simulation.particles
+        half = self.dt / 2
+        ax, ay = self._current_accelerations(simulation)
+        self._kick(simulation, ax, ay, half)
+
+        x, y = particles.x, particles.y
+        x += particles.vx * self.dt
+        y += particles.vy * self.dt
+
+        ax, ay = accelerations(*simulation.compute_forces(), particles.mass)
+        self._kick(simulation, ax, ay, half)
+        self._cache = (particles.version, ax, ay)
+        simulation.time += self.dt
+
+
+class Block_Timestep(_Timestep_Integrator):
+    """
+    Per-particle power-of-two timesteps (block leapfrog).
+    - dt is the largest step; the smallest is dt / 2^levels
+    - eta and length_scale set the step from the acceleration:
+      dt_i <= eta * sqrt(length_scale / |a_i|)
+    - one step() advances the whole scene by dt
+    """
+    def __init__(self, dt=4.0, levels=6, eta=0.2, length_scale=1.0, damping=0.0, max_speed=None):
+        super().__init__(dt, damping, max_speed)
+        self.levels = levels
+        self.eta = eta
+        self.length_scale = length_scale
+        self._state = None  # (particle store version, level, ax, ay)
+
+    def _choose_levels(self, ax, ay):
+        magnitude = np.hypot(ax, ay)
+        with np.errstate(divide="ignore"):
+            wanted = self.eta * np.sqrt(self.length_scale / magnitude)
+        # Smallest k with dt / 2^k <= wanted.
+        with np.errstate(divide="ignore", invalid="ignore"):
+            k = np.ceil(np.log2(self.dt / wanted))
+        return np.clip(np.nan_to_num(k, nan=0.0, posinf=self.levels, neginf=0.0), 0, self.levels).astype(np.int64)
+
+    def step(self, simulation):
+        particles = simulation.particles
+        if self._state is None or self._state[0] != particles.version:
+            ax, ay = accelerations(*simulation.compute_forces(), particles.mass)
+            level = self._choose_levels(ax, ay)
+        else:
+            _, level, ax, ay = self._state
+        vx, vy, x, y, mass = particles.vx, particles.vy, particles.x, particles.y, particles.mass
+
+        substeps = 1 << self.levels
+        dt_min = self.dt / substeps
+        for s in range(substeps):
+            # Particles whose own step starts now: first half kick.
+            period = 1 << (self.levels - level)
+            starting = np.flatnonzero(s % period == 0)
+            step_length = dt_min * period
+            self._kick(simulation, ax, ay, step_length[starting] / 2, starting)
+
+            # Everyone drifts.
+            x += vx * dt_min
+            y += vy * dt_min
+
+            # Particles whose own step ends now: new force, second half kick.
+            ending = np.flatnonzero((s + 1) % period == 0)
+            if len(ending):
+                fx, fy = simulation.compute_forces(targets=ending)
+                new_ax, new_ay = accelerations(fx[ending], fy[ending], mass[ending])
+                ax[ending], ay[ending] = new_ax, new_ay
+                self._kick(simulation, ax, ay, step_length[ending] / 2, ending)
+
+                # New levels: finer any time, coarser only where the coarser
+                # step boundary lines up with this substep.
+                proposed = self._choose_levels(new_ax, new_ay)
+                aligned = ((s + 1) % (1 << (self.levels - proposed))) == 0
+                level[ending] = np.where((proposed > level[ending]) | aligned, proposed, level[ending])
+
+        self._state = (particles.version, level, ax, ay)
+        simulation.time += self.dt
+
+
+INTEGRATORS = {
+    "legacy": Legacy_Integrator,
+    "euler": Semi_Implicit_Euler,
+    "verlet": Velocity_Verlet,
+    "block": Block_Timestep,
+}
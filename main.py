@@ -1,10 +1,88 @@
 import pygame
+import numpy as np
 from pygame import Surface, KMOD_CTRL, K_DELETE, K_BACKSPACE
 from particles import *
 from buttons import *
 from notes_menu import Notes_Menu
-from forces import *
-import math as maths
+from particle_store import PROTON, NEUTRON, ELECTRON, NEUTRINO, SPECIES_CHARGE
+from forces import Electromagnetic_force, strong_nuclear_force
+from simulation import Simulation
+from coarsening import Cluster_Coarsening
+from sleeping import Sleep_Tracker
+from boundaries import Domain_Boundary, POLICIES, EVICT_MARGIN
+from integrators import INTEGRATORS
+from trajectory import Trajectory_Reader, Trajectory_Writer
+from snapshot import save_snapshot, read_snapshot, restore_snapshot
+from scenes import SCENES
+from frame_timer import Frame_Timer
+from renderer import Particle_Renderer, Field_Overlay, LOD_COUNT
+from assets import load_sprites, Overlay
+from physics_thread import Physics_Thread
+from stream import Stream_Client, PORT
+import argparse
+import logging
+import time
+
+# -----------------------------------------------------------------------------
+# Command line options
+# -----------------------------------------------------------------------------
+#   --record PATH:  record every frame to a trajectory file from the start.
+#   --replay PATH:  play back a recorded trajectory instead of simulating.
+#   --connect HOST[:PORT]:
+#                   render a simulation streamed by `python stream.py` on
+#                   another machine instead of simulating (see stream.py).
+#   --threaded-physics [--tick-rate HZ]:
+#                   run the simulation on a worker thread at a fixed tick rate
+#                   and draw interpolated positions.
+#   --integrator {legacy,euler,verlet,block} [--dt DT] [--drag RATE]:
+#                   integration scheme (see integrators.py). legacy is the
+#                   original damped update and ignores --dt/--drag.
+#   --coarsen:      treat stable nuclei as composite bodies for distant
+#                   particles (see coarsening.py).
+#   --sleep:        freeze particles that have come to rest and update forces
+#                   incrementally, so idle scenes are almost free (see
+#                   sleeping.py). Can't be combined with --coarsen.
+#   --load PATH:    start from a saved snapshot (see snapshot.py).
+#   --scene NAME [--count N] [--seed S]:
+#                   start from a generated stress scene (see scenes.py).
+#   --lod-count N:  above N visible particles draw a density heatmap instead
+#                   of sprites (see renderer.py).
+#   --em-mode {direct,barnes_hut,particle_mesh}:
+#                   Coulomb force algorithm (see forces.py).
+#   --strong-table: look the strong force up in a table indexed by r² instead
+#                   of evaluating it per pair (see force_tables.py).
+#   --field:        start with the potential overlay shown (F6 toggles it).
+#   --boundary {evict,reflect,periodic,none} [--margin PX]:
+#                   what happens at the window edges (see boundaries.py).
+#                   none (default) leaves particles free to leave the window;
+#                   evict removes particles more than --margin pixels outside
+#                   it; periodic needs --em-mode direct.
+# -----------------------------------------------------------------------------
+arg_parser = argparse.ArgumentParser(description="Particle Physics simulator")
+arg_parser.add_argument("--record", metavar="PATH", help="record a trajectory from startup")
+arg_parser.add_argument("--replay", metavar="PATH", help="replay a recorded trajectory")
+arg_parser.add_argument("--connect", metavar="HOST[:PORT]", help="view a streamed simulation")
+arg_parser.add_argument("--threaded-physics", action="store_true", help="step physics on a worker thread")
+arg_parser.add_argument("--tick-rate", type=float, default=60, help="physics ticks per second when threaded")
+arg_parser.add_argument("--integrator", choices=sorted(INTEGRATORS), default="legacy", help="integration scheme")
+arg_parser.add_argument("--dt", type=float, default=1.0, help="timestep per step (non-legacy integrators)")
+arg_parser.add_argument("--drag", type=float, default=0.0, help="optional drag rate (non-legacy integrators)")
+force_options = arg_parser.add_mutually_exclusive_group()
+force_options.add_argument("--coarsen", action="store_true", help="coarsen stable nuclei into composite bodies")
+force_options.add_argument("--sleep", action="store_true", help="put particles at rest to sleep")
+arg_parser.add_argument("--load", metavar="PATH", help="start from a saved snapshot")
+arg_parser.add_argument("--scene", choices=sorted(SCENES), help="start from a generated scene")
+arg_parser.add_argument("--count", type=int, default=1000, help="particles in the generated scene")
+arg_parser.add_argument("--seed", type=int, default=0, help="random seed for the generated scene")
+arg_parser.add_argument("--lod-count", type=int, default=LOD_COUNT, help="particle count for density rendering")
+arg_parser.add_argument("--em-mode", choices=Electromagnetic_force.MODES, default="direct", help="Coulomb force algorithm")
+arg_parser.add_argument("--strong-table", action="store_true", help="tabulate the strong force law")
+arg_parser.add_argument("--field", action="store_true", help="show the electric potential overlay")
+arg_parser.add_argument("--boundary", choices=POLICIES + ("none",), default="none", help="window edge policy")
+arg_parser.add_argument("--margin", type=float, default=EVICT_MARGIN, help="eviction distance outside the window")
+args = arg_parser.parse_args()
+if args.boundary == "periodic" and args.em_mode != "direct":
+    arg_parser.error("--boundary periodic needs --em-mode direct")
 
 pygame.init()
 
@@ -30,45 +108,35 @@ pygame.display.set_caption("Particle Physics simulator")
 clock = pygame.time.Clock()
 
 # -----------------------------------------------------------------------------
-# Utility: crop_transparency(image) -> Surface
-# -----------------------------------------------------------------------------
-# Purpose:
-#   Trim fully transparent borders from sprites so rendering/interaction uses a
-#   tight bounding box.
-#
-# Details:
-#   - get_bounding_rect():
-#       Returns a Rect that bounds all pixels with alpha > 0.
-#   - subsurface(rect).copy():
-#       Cuts the image down to that rectangle and returns an independent Surface
-#       copy, so later operations don’t reference the original larger surface.
-# -----------------------------------------------------------------------------
-def crop_transparency(image: pygame.Surface) -> pygame.Surface:
-    rect = image.get_bounding_rect()  # Finds non-transparent area
-    return image.subsurface(rect).copy()
-
-# -----------------------------------------------------------------------------
-# Asset loading (images) & scaling
+# Asset loading (images)
 # -----------------------------------------------------------------------------
 # Steps:
-#   1) Load -> convert_alpha() to preserve per-pixel alpha.
-#   2) crop_transparency() to reduce draw footprint and improve precision.
-#   3) Scale menu overlays relative to window size for an initial layout fit.
+#   1) Particle and button sprites come from the cached atlas (see assets.py):
+#      loaded, convert_alpha()'d and cropped once, then reused while the PNGs
+#      are unchanged.
+#   2) Menu overlays are Overlay objects: loaded, cropped and scaled to the
+#      window the first time they are shown, and rescaled after a resize.
 # -----------------------------------------------------------------------------
-proton_img = crop_transparency(pygame.image.load("proton.png").convert_alpha())
-neutron_img = crop_transparency(pygame.image.load("neutron.png").convert_alpha())
-electron_img = crop_transparency(pygame.image.load("electron.png").convert_alpha())
-neutrino_img = crop_transparency(pygame.image.load("neutrino.png").convert_alpha())
-
-exit_button_img = crop_transparency(pygame.image.load("exit_button.png").convert_alpha())
-user_note_img = crop_transparency(pygame.image.load("user_note.png").convert_alpha())
-help_button_img = crop_transparency(pygame.image.load("help_button.png").convert_alpha())
-
-help_menu = crop_transparency(pygame.image.load("help_menu.png").convert_alpha())
-help_menu = pygame.transform.scale(help_menu, ((screen_width * 0.50), (screen_height * 0.75)))
-
-under_construction = crop_transparency(pygame.image.load("under construction.png").convert_alpha())
-under_construction = pygame.transform.scale(under_construction, ((screen_width * 0.70), (screen_height * 0.75)))
+sprites = load_sprites({
+    "proton": "proton.png",
+    "neutron": "neutron.png",
+    "electron": "electron.png",
+    "neutrino": "neutrino.png",
+    "exit_button": "exit_button.png",
+    "user_note": "user_note.png",
+    "help_button": "help_button.png",
+})
+proton_img = sprites["proton"]
+neutron_img = sprites["neutron"]
+electron_img = sprites["electron"]
+neutrino_img = sprites["neutrino"]
+
+exit_button_img = sprites["exit_button"]
+user_note_img = sprites["user_note"]
+help_button_img = sprites["help_button"]
+
+help_menu = Overlay("help_menu.png", 0.50, 0.75)
+under_construction = Overlay("under construction.png", 0.70, 0.75)
 
 # -----------------------------------------------------------------------------
 # UI layout constants
@@ -115,23 +183,230 @@ notes_menu = Notes_Menu(X_POS_NOTE_MENU, Y_POS_NOTE_MENU, width=int(screen_width
 # -----------------------------------------------------------------------------
 # Simulation state containers
 # -----------------------------------------------------------------------------
-#   - particle_list:
-#       A list of (particle_object, sprite_surface) used for update and render.
+#   - simulation:
+#       Headless Simulation that owns the particle state, force models and
+#       integration. main.py only renders it and forwards input to it.
+#   - particles:
+#       The simulation's Particle_Store (x, y, vx, vy, charge, mass, species
+#       id in contiguous arrays), read here for rendering.
+#   - species_images:
+#       Sprite for each species id, indexed by particles.species.
 #   - running:
 #       Main loop control flag.
 # -----------------------------------------------------------------------------
-particle_list = []
+if args.integrator == "legacy":
+    integrator = INTEGRATORS["legacy"]()
+else:
+    integrator = INTEGRATORS[args.integrator](dt=args.dt, damping=args.drag)
+simulation = Simulation(em_force=Electromagnetic_force(mode=args.em_mode),
+                        strong_force=strong_nuclear_force(use_table=args.strong_table),
+                        integrator=integrator,
+                        coarsening=Cluster_Coarsening() if args.coarsen else None,
+                        sleeping=Sleep_Tracker() if args.sleep else None,
+                        boundary=None if args.boundary == "none" else Domain_Boundary(
+                            args.boundary, screen_width, screen_height, args.margin))
+particles = simulation.particles
+
+species_images = {
+    PROTON: proton_img,
+    NEUTRON: neutron_img,
+    ELECTRON: electron_img,
+    NEUTRINO: neutrino_img,
+}
+
+renderer = Particle_Renderer(species_images, lod_count=args.lod_count)
+
+# -----------------------------------------------------------------------------
+# Field overlay
+# -----------------------------------------------------------------------------
+#   F6 toggles a heatmap of the electric potential. It is read from the
+#   particle mesh of simulation.em_force: in --em-mode particle_mesh the
+#   physics step has already solved it, otherwise (and in replays) the mesh
+#   is solved here for the particles on screen. The mesh always spans the
+#   window so the whole screen is covered.
+# -----------------------------------------------------------------------------
+field_overlay = Field_Overlay(visible=args.field)
+simulation.em_force.mesh.bounds = (0, 0, screen_width, screen_height)
+
+
+def field_mesh(shown):
+    em_force = simulation.em_force
+    if em_force.mode != "particle_mesh" or viewer_only:
+        charge = SPECIES_CHARGE[np.asarray(shown.species)]
+        charged = charge != 0
+        em_force.mesh.net_force(np.asarray(shown.x)[charged], np.asarray(shown.y)[charged], charge[charged],
+                                em_force.COLOUMBS_CONSTANT)
+    return em_force.mesh
+
+# -----------------------------------------------------------------------------
+# Snapshots & generated scenes
+# -----------------------------------------------------------------------------
+#   - F5 saves the whole scene to QUICKSAVE_PATH, F9 loads it back.
+#   - On exit the scene is saved to AUTOSAVE_PATH, so it can be reopened with
+#     --load autosave.snap. Nothing is saved if the scene was never edited or
+#     simulated (e.g. after a failed --load).
+#   - --scene fills the window with one of the scenes.py generators.
+# -----------------------------------------------------------------------------
+QUICKSAVE_PATH = "quicksave.snap"
+AUTOSAVE_PATH = "autosave.snap"
+
+
+def save_scene(path):
+    try:
+        save_snapshot(path, simulation)
+    except OSError as error:
+        logging.error(f"Failed to save snapshot {path}: {error}")
+
+
+def load_scene(path):
+    # restore_snapshot checks the parameters before replacing anything, so a
+    # failed load keeps the current scene.
+    try:
+        restore_snapshot(simulation, read_snapshot(path))
+    except (OSError, ValueError) as error:
+        logging.error(f"Failed to load snapshot {path}: {error}")
+
+
+def scene_changed():
+    """
+    True once the scene has been edited or simulated since start-up, so a
+    failed --load doesn't overwrite the autosave with an empty scene.
+    """
+    return particles.version != start_version or (len(particles) > 0 and simulation.steps != start_steps)
+
+
+if args.load:
+    load_scene(args.load)
+elif args.scene:
+    generated = SCENES[args.scene](args.count, width=screen_width, height=screen_height, seed=args.seed)
+    particles.extend(generated.species, generated.x, generated.y, generated.vx, generated.vy)
+start_version = particles.version
+start_steps = simulation.steps
 
 running = True
 
+# -----------------------------------------------------------------------------
+# Recording & replay
+# -----------------------------------------------------------------------------
+#   - recorder:
+#       Trajectory_Writer while recording (toggle with R), else None. One frame
+#       is appended after every simulation step.
+#   - replay:
+#       Trajectory_Reader in replay mode, else None. The file is memory-mapped
+#       and replay_frame can jump anywhere in O(1).
+#   - remote:
+#       Stream_Client when viewing a streamed simulation (--connect), else
+#       None. Like replays, the local simulation is then not stepped or edited.
+#
+# Replay controls:
+#   Space: play/pause   Left/Right: step one frame (x100 with Shift)
+#   Home/End: first/last frame
+# -----------------------------------------------------------------------------
+recorder = Trajectory_Writer(args.record, simulation.parameters()) if args.record else None
+replay = Trajectory_Reader(args.replay) if args.replay else None
+replay_frame = 0
+replay_playing = True
+
+remote = None
+if args.connect:
+    host, _, port = args.connect.partition(":")
+    remote = Stream_Client(host, int(port) if port else PORT)
+    remote.start()
+viewer_only = replay is not None or remote is not None
+
+
+def toggle_recording():
+    global recorder
+    if recorder is not None:
+        recorder.close()
+        recorder = None
+    else:
+        path = time.strftime("recording_%Y%m%d_%H%M%S.traj")
+        recorder = Trajectory_Writer(path, simulation.parameters())
+
+
+def replay_seek(event, frame, frame_count):
+    step = 100 if pygame.key.get_mods() & pygame.KMOD_SHIFT else 1
+    if event.key == pygame.K_LEFT:
+        frame -= step
+    elif event.key == pygame.K_RIGHT:
+        frame += step
+    elif event.key == pygame.K_HOME:
+        frame = 0
+    elif event.key == pygame.K_END:
+        frame = frame_count - 1
+    return max(0, min(frame, frame_count - 1))
+
+# -----------------------------------------------------------------------------
+# Threaded physics
+# -----------------------------------------------------------------------------
+#   - physics:
+#       Physics_Thread stepping the simulation at --tick-rate, or None when the
+#       simulation is stepped once per frame in the main loop.
+#   - edit(function, *args):
+#       Runs a scene edit (add/remove/clear, recording toggle). With threaded
+#       physics it is queued to run on the physics thread between steps.
+# -----------------------------------------------------------------------------
+def record_step(simulation):
+    if recorder is not None:
+        recorder.write_frame(simulation.particles, simulation.steps)
+
+
+physics = None
+if args.threaded_physics and not viewer_only:
+    physics = Physics_Thread(simulation, args.tick_rate, on_step=record_step)
+    physics.start()
+
+
+def edit(function, *args):
+    if physics is not None:
+        physics.submit(function, *args)
+    else:
+        function(*args)
+
+
+def shutdown():
+    if physics is not None:
+        physics.stop()
+    if remote is not None:
+        remote.close()
+    if not viewer_only and scene_changed():
+        save_scene(AUTOSAVE_PATH)
+    if recorder is not None:
+        recorder.close()
+    notes_menu.close()
+
+# -----------------------------------------------------------------------------
+# Performance HUD
+# -----------------------------------------------------------------------------
+#   - frame_timer:
+#       Times each phase of the loop into a ring buffer.
+#       F3 toggles the HUD, F4 dumps the buffer to CSV (Shift+F4: JSON).
+# -----------------------------------------------------------------------------
+frame_timer = Frame_Timer()
+hud_font = pygame.font.SysFont("consolas", 16)
+
+
+def dump_frame_times(as_json):
+    path = time.strftime("frame_times_%Y%m%d_%H%M%S") + (".json" if as_json else ".csv")
+    frame_timer.dump(path)
+
+
+def draw_error(message):
+    # Red banner at the top of the window for failures the user must see.
+    text = hud_font.render(message, True, (255, 255, 255))
+    panel = text.get_rect(midtop=(screen.get_width() // 2, 10)).inflate(16, 8)
+    pygame.draw.rect(screen, (150, 30, 30), panel)
+    screen.blit(text, text.get_rect(center=panel.center))
+
 # -----------------------------------------------------------------------------
 # Main loop: input → update → render → events → present
 # -----------------------------------------------------------------------------
 # Order each frame:
 #   1) Sample continuous input (mouse position).
-#   2) Clear the screen and draw particles (world).
+#   2) Clear and draw particles (world), whole window or dirty rects only.
 #   3) Draw UI (buttons/menus).
-#   4) Build physics input, compute forces, integrate motion.
+#   4) Advance the simulation by one step.
 #   5) Process event queue (window/keyboard).
 #   6) Present frame & cap FPS.
 # -----------------------------------------------------------------------------
@@ -148,20 +423,41 @@ while running:
     x_pos -= 5
     y_pos -= 5
 
-    # -----------------------------------------------------------------------------
-    # Frame clear
-    # -----------------------------------------------------------------------------
-    # Fill backbuffer before drawing everything for this frame.
-    # -----------------------------------------------------------------------------
-    screen.fill((0,0,0))
+    frame_timer.begin_frame()
 
     # -----------------------------------------------------------------------------
-    # World rendering: particles
+    # World rendering: clear & particles
     # -----------------------------------------------------------------------------
-    # Draw every (particle, image) at the particle's (x, y) position.
+    # Particle_Renderer culls off-screen particles and draws each species in one
+    # batched call. When only a few particles moved it erases and redraws just
+    # those areas and returns the rects to present (update_rects); otherwise it
+    # clears the whole window and returns None.
+    #
+    # Overlays (help, notes, HUD) cover large areas, so while one is open every
+    # frame is a full redraw. In replay mode the particles come from the current
+    # recorded frame, when connected from the latest streamed one.
     # -----------------------------------------------------------------------------
-    for particle, image in particle_list:
-        screen.blit(image, (particle.x, particle.y))
+    if replay is not None and len(replay):
+        shown = replay.frame(replay_frame)
+    elif remote is not None:
+        shown = remote.state()
+    elif physics is not None:
+        shown = physics.interpolated_state()
+    else:
+        shown = particles
+    if physics is not None and physics.error is not None:
+        failure = f"Physics stopped: {physics.error!r}"
+    elif remote is not None and remote.error is not None:
+        failure = f"Stream stopped: {remote.error!r}"
+    else:
+        failure = None
+    overlay_open = (help_button.menu_visible or user_note_button.menu_visible or frame_timer.enabled
+                    or field_overlay.visible or failure is not None)
+    ui_rects = [exit_button.rect, user_note_button.rect, help_button.rect]
+    update_rects = renderer.draw(screen, shown.species, shown.x, shown.y, full=overlay_open, static_rects=ui_rects)
+    if field_overlay.visible:
+        field_overlay.draw(screen, field_mesh(shown))
+    frame_timer.mark("render")
 
     # -----------------------------------------------------------------------------
     # UI overlays & buttons
@@ -175,98 +471,47 @@ while running:
 
     # Help overlay when visible.
     if help_button.menu_visible:
-        screen.blit(help_menu, (X_POS_HELP_MENU, Y_POS_HELP_MENU))
+        screen.blit(help_menu.get((screen_width, screen_height)), (X_POS_HELP_MENU, Y_POS_HELP_MENU))
+
+    frame_timer.mark("ui")
 
     # each frame:
     if user_note_button.menu_visible:
         notes_menu.update(clock.get_time())
         notes_menu.draw(screen)
+    frame_timer.mark("notes")
 
     # Draw static buttons each frame (hover/click visuals may be internal).
     exit_button.draw(screen)
     user_note_button.draw(screen)
     help_button.draw(screen)
 
-    # -----------------------------------------------------------------------------
-    # Physics input build
-    # -----------------------------------------------------------------------------
-    # Converts particles into a simple, immutable structure that force modules
-    # can consume safely.
-    #
-    # Each entry:
-    #   { 'x': float, 'y': float, 'charge': float, 'mass': float }
-    # -----------------------------------------------------------------------------
-    physics_data = [{'x': particle.x, 'y': particle.y, 'charge': particle.charge, 'mass': particle.mass}
-                    for particle, _ in particle_list]
-
-    #------------------------------------------------------------------------------
-    # Force evaluation
-    # -----------------------------------------------------------------------------
-    # Instantiates force models and computes net forces per particle for this frame.
-    #
-    # Notes:
-    #   - em_forces[i] and strong_forces[i] correspond to particle_list[i].
-    # -----------------------------------------------------------------------------
-    em_force = Electromagnetic_force()
-    strong_force_instance = strong_nuclear_force()
+    # Performance HUD when enabled.
+    if frame_timer.enabled:
+        evicted = None if simulation.boundary is None or viewer_only else simulation.boundary.evicted_total
+        frame_timer.draw(screen, hud_font, clock.get_fps(), len(shown), evicted)
 
-    em_forces = em_force.calculate_net_force(physics_data)
-    strong_forces = strong_force_instance.calculate_net_force(physics_data)
+    # The physics thread stopped on an exception, or the stream connection
+    # failed: say so instead of showing a silently frozen or empty scene.
+    if failure is not None:
+        draw_error(failure)
+    frame_timer.mark("ui")
 
     # -----------------------------------------------------------------------------
-    # Integration parameters
+    # Physics
     # -----------------------------------------------------------------------------
-    #   - MAX_SPEED:
-    #       Hard cap on velocity magnitude to prevent numeric explosions/tunneling.
-    #   - DAMPING:
-    #       Simple multiplicative damping factor (0 < DAMPING < 1) for stability.
+    # One integration step per frame: forces, damping, speed cap and position
+    # update all live in Simulation (see simulation.py). In replay mode the
+    # recorded frames are played back instead; with threaded physics the worker
+    # thread steps the simulation on its own clock, when connected the server.
     # -----------------------------------------------------------------------------
-    MAX_SPEED = 25
-    DAMPING = 0.20
-
-    # -----------------------------------------------------------------------------
-    # Motion integration: accelerate → damp → cap → advance
-    # -----------------------------------------------------------------------------
-    # Combines forces, computes acceleration (a = F / m), and updates velocity/position.
-    #
-    # Edge case:
-    #   - For mass == 0, use a small fallback (ax=ay=1) to avoid division by zero.
-    # -----------------------------------------------------------------------------
-    for i, (particle, _) in enumerate(particle_list):
-
-        fx, fy = (
-            em_forces[i][0] + strong_forces[i][0],
-            em_forces[i][1] + strong_forces[i][1]
-        )
-
-        # Acceleration from net force
-        if particle.mass != 0:
-            ax = fx / particle.mass
-            ay = fy / particle.mass
-        else:
-            ax = 1
-            ay = 1
-
-        # Velocity update
-        particle.vx += ax
-        particle.vy += ay
-
-        # Damping
-        particle.vx *= DAMPING
-        particle.vy *= DAMPING
-
-        # Speed cap
-        speed = maths.hypot(particle.vx, particle.vy)
-        if speed > MAX_SPEED:
-            scale = MAX_SPEED / speed
-            particle.vx *= scale
-            particle.vy *= scale
-        else:
-            pass
-
-        # Position update
-        particle.x += particle.vx
-        particle.y += particle.vy
+    if replay is not None:
+        if replay_playing and replay_frame < len(replay) - 1:
+            replay_frame += 1
+    elif physics is None and remote is None:
+        simulation.step()
+        record_step(simulation)
+    frame_timer.mark("physics")
 
     # -----------------------------------------------------------------------------
     # Event processing: window, input, keyboard-driven particle placement
@@ -274,6 +519,7 @@ while running:
     for event in pygame.event.get():
         # Window close (X button).
         if event.type == pygame.QUIT:
+            shutdown()
             pygame.quit()
             exit()
 
@@ -294,6 +540,10 @@ while running:
         elif event.type == pygame.VIDEORESIZE:
             screen_width, screen_height = event.w, event.h
             screen = pygame.display.set_mode((screen_width, screen_height), pygame.RESIZABLE)
+            renderer.invalidate()
+            simulation.em_force.mesh.bounds = (0, 0, screen_width, screen_height)
+            if simulation.boundary is not None:
+                edit(simulation.boundary.resize, screen_width, screen_height)
             button_x = screen_width - 100
             button_y = 0
             user_note_button = Notes_Button(button_x, button_y, user_note_img)
@@ -330,18 +580,19 @@ while running:
         #
         #   - Backspace behavior:
         #       If the user presses Backspace and there is at least one particle
-        #       (len(particle_list) >= 1), we pop the last entry to "undo" the most
+        #       (len(particles) >= 1), we pop the last entry to "undo" the most
         #       recent placement.
         #
         #   - Ctrl + Delete behavior:
         #       If Ctrl is held (mods & pygame.KMOD_CTRL) AND the Delete key is pressed,
-        #       we call particle_list.clear() to remove all particles at once.
+        #       we call simulation.clear() to remove all particles at once.
         #
         #   - Dictionary-based particle placement:
         #       If the pressed key exists in key_actions:
         #           * Unpack (constructor, image) from the mapping.
         #           * Create the particle at the current cursor (x_pos, y_pos).
-        #           * Append (particle, image) to particle_list for update & rendering.
+        #           * Add the particle to the simulation for update & rendering;
+        #             its species id selects the sprite when drawing.
         #
         # Notes:
         #   - The order of checks matters:
@@ -350,22 +601,63 @@ while running:
         #   - key_actions is defined elsewhere and maps keys like pygame.K_p to a
         #     (constructor, image) pair. This keeps the event logic clean and scalable.
         # -----------------------------------------------------------------------------
+        # Performance HUD toggle / dump.
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+            frame_timer.toggle()
+            continue
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_F4:
+            dump_frame_times(as_json=bool(pygame.key.get_mods() & pygame.KMOD_SHIFT))
+            continue
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_F6:
+            field_overlay.visible = not field_overlay.visible
+            continue
+
+        # Replay mode: keys control playback, the scene can't be edited.
+        if replay is not None:
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
+                replay_playing = not replay_playing
+            elif event.type == pygame.KEYDOWN and len(replay):
+                replay_frame = replay_seek(event, replay_frame, len(replay))
+            continue
+        # Connected to a stream: view only.
+        if remote is not None:
+            continue
+
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_r:
+            edit(toggle_recording)
+            continue
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_F5:
+            edit(save_scene, QUICKSAVE_PATH)
+            continue
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_F9:
+            edit(load_scene, QUICKSAVE_PATH)
+            continue
+
         if event.type == pygame.KEYDOWN:
             mods = pygame.key.get_mods()
-            if event.key == K_BACKSPACE and len(particle_list) >= 1:
-                particle_list.pop()
+            if event.key == K_BACKSPACE and len(particles) >= 1:
+                edit(simulation.remove_last)
             if mods & pygame.KMOD_CTRL and event.key == pygame.K_DELETE:
-                particle_list.clear()
+                edit(simulation.clear)
             elif event.key in key_actions:
                 constructor, image = key_actions[event.key]
                 particle = constructor(x_pos, y_pos)
-                particle_list.append((particle, image))
+                edit(simulation.add_particle, particle)
 
     # -----------------------------------------------------------------------------
     # Frame present & pacing
     # -----------------------------------------------------------------------------
-    #   - pygame.display.update(): swaps the backbuffer to the screen.
+    #   - pygame.display.update(): swaps the backbuffer to the screen, either
+    #     whole or only the dirty rects the renderer reported.
     #   - clock.tick(60): caps the frame rate at ~60 FPS for consistent timing.
     # -----------------------------------------------------------------------------z
-    pygame.display.update()
-    clock.tick(60)
\ No newline at end of file
+    frame_timer.mark("events")
+    if update_rects is None:
+        pygame.display.update()
+    else:
+        pygame.display.update(update_rects)
+    frame_timer.mark("present")
+    frame_timer.end_frame(len(shown))
+    clock.tick(60)
+
+shutdown()
@@ -1,5 +1,9 @@
 import pygame
 import logging
+import atexit
+import queue
+import threading
+from collections import OrderedDict
 
 # Configure logging: write to a file called app.log
 logging.basicConfig(
@@ -8,14 +12,73 @@ logging.basicConfig(
     format="%(asctime)s - %(levelname)s - %(message)s"
 )
 
+class Note_Writer:
+    """
+    Appends notes to a file from a background thread.
+    - write() only queues the line, so the main loop never waits on the disk
+    - lines queued close together are written with a single open/append
+    - close() (also run at interpreter exit) flushes everything still queued
+    """
+    _STOP = object()
+
+    def __init__(self, path="notes.txt"):
+        self.path = path
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="note-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, line: str):
+        self._queue.put(line)
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            # Take whatever else is already waiting so it goes out in one write.
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if self._STOP in batch:
+                stopping = True
+                batch = [line for line in batch if line is not self._STOP]
+            if batch:
+                self._append(batch)
+
+    def _append(self, lines):
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(line + "\n" for line in lines))
+        # -----------------------------------------------------------------------------
+        # Catches:
+        #   -FileNotFoundErrors: if you pass a path to a file in a directory that doesn’t exist
+        #   -PermissionError: if you don’t have permission to create or write to the file/location.
+        #   -IsADirectoryError: if "notes.txt" is actually a directory name.
+        #   -OSError (general I/O): for other OS-level problems (invalid path characters, device errors, etc.).
+        # -----------------------------------------------------------------------------
+        except OSError as error:
+            logging.error(f"Failed to write note to file: {error}")
+
+
 class Notes_Menu:
     """
     Single-line notes input for pygame 2.x.
-    - Enter commits note (saved in self.notes and appended to notes.txt)
+    - Enter commits note (saved in self.notes and appended to notes.txt in the background)
     - Backspace deletes one char
     - Characters handled via TEXTINPUT (preferred) + KEYDOWN unicode fallback
+    - Rendered text surfaces are cached by (text, colour), so unchanged notes
+      and labels are rendered once
     """
-    def __init__(self, x, y, width=600, height=300, font_size=28):
+    TEXT_CACHE_SIZE = 128
+
+    def __init__(self, x, y, width=600, height=300, font_size=28, notes_path="notes.txt"):
         # Layout
         self.rect = pygame.Rect(x, y, width, height)
         pad = 20
@@ -37,6 +100,10 @@ class Notes_Menu:
 
         # Saved notes
         self.notes = []
+        self.writer = Note_Writer(notes_path)
+
+        # Rendered text, least recently used first
+        self._text_cache = OrderedDict()
 
     # ----- Input handling -----
     def handle_key(self, event: pygame.event.Event):
@@ -48,19 +115,8 @@ class Notes_Menu:
             if current_note:
                 self.notes.append(current_note)
                 self.text = ""
-                # Optional persistence
-                try:
-                    with open("notes.txt", "a", encoding="utf-8") as f:
-                        f.write(current_note + "\n")
-                # -----------------------------------------------------------------------------
-                # Catches:
-                #   -FileNotFoundErrors: if you pass a path to a file in a directory that doesn’t exist
-                #   -PermissionError: if you don’t have permission to create or write to the file/location.
-                #   -IsADirectoryError: if "notes.txt" is actually a directory name.
-                #   -OSError (general I/O): for other OS-level problems (invalid path characters, device errors, etc.).
-                # -----------------------------------------------------------------------------
-                except OSError as error:
-                    logging.error(f"Failed to write note to file: {error}")
+                # Optional persistence (written by the background Note_Writer)
+                self.writer.write(current_note)
 
         elif event.key == pygame.K_BACKSPACE:
             self.text = self.text[:-1]
@@ -73,7 +129,25 @@ class Notes_Menu:
             self.text += text
 
 
+    def close(self):
+        """
+        Flush notes still waiting to be written. Call on exit.
+        """
+        self.writer.close()
+
     # ----- Update / draw -----
+    def _render_text(self, text: str, colour) -> pygame.Surface:
+        key = (text, colour)
+        surf = self._text_cache.get(key)
+        if surf is None:
+            surf = self.font.render(text, True, colour)
+            self._text_cache[key] = surf
+            if len(self._text_cache) > self.TEXT_CACHE_SIZE:
+                self._text_cache.popitem(last=False)
+        else:
+            self._text_cache.move_to_end(key)
+        return surf
+
     def update(self, dt_ms: int):
         self.cursor_timer += dt_ms
         if self.cursor_timer >= self.cursor_interval_ms:
@@ -90,7 +164,7 @@ class Notes_Menu:
         pygame.draw.rect(surface, self.input_border, self.input_rect, 2, border_radius=6)
 
         # Current text
-        txt_surf = self.font.render(self.text, True, (255, 255, 255))
+        txt_surf = self._render_text(self.text, (255, 255, 255))
         surface.blit(txt_surf, (self.input_rect.x + 8, self.input_rect.y + 10))
 
         # Caret
@@ -101,7 +175,7 @@ class Notes_Menu:
             pygame.draw.line(surface, (255, 255, 255), (cursor_x, cursor_y1), (cursor_x, cursor_y2), 2)
 
         # Title
-        title = self.font.render("Notes", True, (255, 255, 0))
+        title = self._render_text("Notes", (255, 255, 0))
         surface.blit(title, (self.rect.x + 20, self.rect.y + self.rect.height - 40))
 
         # Notes preview
@@ -111,6 +185,6 @@ class Notes_Menu:
 
         y_line = self.notes_area.y
         for note in to_show:
-            note_surf = self.font.render(f"• {note}", True, (255,255,255))
+            note_surf = self._render_text(f"• {note}", (255,255,255))
             surface.blit(note_surf, (self.notes_area.x, y_line))
             y_line += line_h
\ No newline at end of file
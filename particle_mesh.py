@@ -0,0 +1,188 @@
+import numpy as np
+
+# -----------------------------------------------------------------------------
+# Particle-mesh (PM) solver for the 1/r² electromagnetic interaction
+# -----------------------------------------------------------------------------
+# Purpose:
+#   Replace the O(N²) pair sum for dense plasmas by a grid: charges are
+#   deposited on a mesh, the field is obtained by one convolution done with
+#   FFTs, and forces are interpolated back. Cost ~O(N + G log G) for G cells.
+#
+# Details:
+#   - The mesh covers the bounding box of the charges, extended to bounds
+#     (e.g. the window) when set, with square cells of cell_size pixels. Its size is rounded up to 2^k or 3·2^k cells so the
+#     kernel transform can be reused from frame to frame; when the particles
+#     spread too far for max_cells, the cell size is doubled instead (and
+#     the short-range radius with it, so the accuracy stays the same).
+#   - Deposit and interpolation use cloud-in-cell (bilinear) weights. Using
+#     the same weights both ways with an antisymmetric kernel means there is no
+#     self-force and pair forces stay equal and opposite.
+#   - Hockney's method: the grid is zero-padded to twice its size so the
+#     circular FFT convolution equals the open-boundary (non-periodic) sum.
+#   - Short-range split (short_range_cells > 0): the pair force is split as
+#       F(r) = F(r)·g(r) + F(r)·(1 - g(r)),  u = r / r_c,
+#       g = 1 - u³(4 - 3u) for u < 1, 0 beyond
+#     The mesh only carries the smooth long-range part, which is finite at
+#     r = 0 and barely affected by the grid; the short-range part is summed
+#     exactly over pairs closer than r_c = short_range_cells · cell_size
+#     (see Electromagnetic_force "particle_mesh" mode). g is exactly zero at
+#     r_c, so nothing is lost by truncating the pair sum there.
+#   - Without the split the mesh carries the full 1/r² kernel, and forces
+#     between particles within a cell or two of each other are smoothed out.
+#   - The transformed charge density of the last solve is kept, so the
+#     potential for the field overlay costs one extra inverse FFT and only
+#     when it is asked for.
+# -----------------------------------------------------------------------------
+CELL_SIZE = 4.0
+SHORT_RANGE_CELLS = 5.0
+MAX_CELLS = 1024
+
+
+def short_range_fraction(distance, cutoff):
+    """
+    g(r): the share of the pair force summed directly (1 at r = 0, 0 from cutoff on).
+    """
+    u = np.minimum(distance / cutoff, 1.0)
+    return 1.0 - u ** 3 * (4.0 - 3.0 * u)
+
+
+def _fft_size(n):
+    # Smallest 2^k or 3·2^k that is at least n.
+    size = 1
+    while size < n:
+        size *= 2
+    if size * 3 // 4 >= n:
+        return size * 3 // 4
+    return size
+
+
+class Particle_Mesh:
+    """
+    Grid solver for the Coulomb interaction with constant k (force on i is
+    k·q_i·q_j·d/|d|³, d from j to i).
+    - net_force(x, y, charge, k) -> (fx, fy), long-range part only when
+      short_range_cells > 0
+    - cutoff is the radius of the exact short-range correction for the
+      last solve (0 = none)
+    - potential() -> (grid, origin, cell) for the last solve, or None
+    - bounds: optional (x0, y0, x1, y1) the mesh always covers
+    """
+    def __init__(self, cell_size=CELL_SIZE, short_range_cells=SHORT_RANGE_CELLS, max_cells=MAX_CELLS, bounds=None):
+        self.cell_size = cell_size
+        self.short_range_cells = short_range_cells
+        self.max_cells = max_cells
+        self.bounds = bounds
+        self.cutoff = short_range_cells * cell_size
+        self._kernels = None  # (key, Gx, Gy, potential kernel or None)
+        self._last = None     # (rho transform, shape, origin, cell, k)
+
+    def _grid(self, x, y):
+        x0, y0, x1, y1 = x.min(), y.min(), x.max(), y.max()
+        if self.bounds is not None:
+            x0, y0 = min(x0, self.bounds[0]), min(y0, self.bounds[1])
+            x1, y1 = max(x1, self.bounds[2]), max(y1, self.bounds[3])
+        x0, y0 = np.floor(x0), np.floor(y0)
+        cell = self.cell_size
+        while max(x1 - x0, y1 - y0) / cell + 2 > self.max_cells:
+            cell *= 2
+        nx = _fft_size(int((x1 - x0) / cell) + 2)
+        ny = _fft_size(int((y1 - y0) / cell) + 2)
+        return (x0, y0), cell, (nx, ny)
+
+    def _offsets(self, shape, cell):
+        # Separation (in pixels) of every cell of the padded grid from cell
+        # (0, 0), with wrap-around, so the FFT product is the open sum.
+        nx, ny = shape
+        ox = np.arange(2 * nx)
+        oy = np.arange(2 * ny)
+        ox = np.where(ox < nx, ox, ox - 2 * nx) * cell
+        oy = np.where(oy < ny, oy, oy - 2 * ny) * cell
+        return ox[:, None], oy[None, :]
+
+    def _force_kernels(self, shape, cell, k):
+        key = (shape, cell, k, self.short_range_cells)
+        if self._kernels is None or self._kernels[0] != key:
+            dx, dy = self._offsets(shape, cell)
+            r = np.hypot(dx, dy)
+            cutoff = self.short_range_cells * cell
+            with np.errstate(divide="ignore", invalid="ignore"):
+                scale = k / r ** 3
+                if cutoff > 0:
+                    scale *= 1.0 - short_range_fraction(r, cutoff)
+            scale[0, 0] = 0.0
+            self._kernels = (key, np.fft.rfft2(scale * dx), np.fft.rfft2(scale * dy), None)
+        return self._kernels
+
+    def _potential_kernel(self, shape, cell, k):
+        key, gx, gy, kernel = self._force_kernels(shape, cell, k)
+        if kernel is None:
+            dx, dy = self._offsets(shape, cell)
+            r = np.hypot(dx, dy)
+            cutoff = self.short_range_cells * cell
+            if cutoff > 0:
+                # Integral of the long-range force: k/r beyond the cutoff,
+                # finite at r = 0.
+                u = np.minimum(r / cutoff, 1.0)
+                with np.errstate(divide="ignore"):
+                    phi = np.where(r < cutoff, k / cutoff * (2 - 2 * u ** 2 + u ** 3), k / r)
+            else:
+                phi = k / np.maximum(r, cell)
+            kernel = np.fft.rfft2(phi)
+            self._kernels = (key, gx, gy, kernel)
+        return kernel
+
+    def _weights(self, x, y, origin, cell):
+        gx = (x - origin[0]) / cell
+        gy = (y - origin[1]) / cell
+        i = gx.astype(np.int64)
+        j = gy.astype(np.int64)
+        fx = gx - i
+        fy = gy - j
+        return i, j, ((0, 0, (1 - fx) * (1 - fy)), (1, 0, fx * (1 - fy)),
+                      (0, 1, (1 - fx) * fy), (1, 1, fx * fy))
+
+    def net_force(self, x, y, charge, k):
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        charge = np.asarray(charge, dtype=float)
+        n = len(x)
+        if n < 2:
+            self._last = None
+            self.cutoff = self.short_range_cells * self.cell_size
+            return np.zeros(n), np.zeros(n)
+
+        origin, cell, shape = self._grid(x, y)
+        nx, ny = shape
+        i, j, corners = self._weights(x, y, origin, cell)
+        rho = np.zeros(4 * nx * ny)
+        for di, dj, w in corners:
+            rho += np.bincount((i + di) * 2 * ny + (j + dj), charge * w, minlength=4 * nx * ny)
+        rho_hat = np.fft.rfft2(rho.reshape(2 * nx, 2 * ny))
+
+        _, gx, gy, _ = self._force_kernels(shape, cell, k)
+        field_x = np.fft.irfft2(rho_hat * gx, s=(2 * nx, 2 * ny))[:nx, :ny]
+        field_y = np.fft.irfft2(rho_hat * gy, s=(2 * nx, 2 * ny))[:nx, :ny]
+        self._last = (rho_hat, shape, origin, cell, k)
+        self.cutoff = self.short_range_cells * cell
+
+        ex = np.zeros(n)
+        ey = np.zeros(n)
+        for di, dj, w in corners:
+            ex += field_x[i + di, j + dj] * w
+            ey += field_y[i + di, j + dj] * w
+        return charge * ex, charge * ey
+
+    def potential(self):
+        """
+        Electric potential on the mesh of the last net_force call as
+        (grid[nx, ny], (x0, y0) of cell (0, 0), cell size), or None.
+        The short-range part is left out, so peaks are rounded off.
+        """
+        last = self._last
+        if last is None:
+            return None
+        rho_hat, shape, origin, cell, k = last
+        nx, ny = shape
+        kernel = self._potential_kernel(shape, cell, k)
+        grid = np.fft.irfft2(rho_hat * kernel, s=(2 * nx, 2 * ny))[:nx, :ny]
+        return grid, origin, cell
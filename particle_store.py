@@ -0,0 +1,174 @@
+import numpy as np
+from particles import Particles, Baryon, Lepton
+
+# -----------------------------------------------------------------------------
+# Species table
+# -----------------------------------------------------------------------------
+# Each particle in the store carries a small integer species id instead of a
+# name string. The ids index into SPECIES_NAMES and SPECIES_FACTORIES.
+# -----------------------------------------------------------------------------
+PROTON, NEUTRON, ELECTRON, NEUTRINO = range(4)
+
+SPECIES_NAMES = ("proton", "neutron", "electron", "neutrino")
+SPECIES_IDS = {name: species_id for species_id, name in enumerate(SPECIES_NAMES)}
+SPECIES_FACTORIES = (Baryon.proton, Baryon.neutron, Lepton.electron, Lepton.neutrino)
+# Charge and mass per species id, taken from the factories, for bulk loading.
+SPECIES_CHARGE = np.array([factory(0, 0).charge for factory in SPECIES_FACTORIES], dtype=np.float64)
+SPECIES_MASS = np.array([factory(0, 0).mass for factory in SPECIES_FACTORIES], dtype=np.float64)
+
+
+class Particle_Store:
+    """
+    Contiguous array storage for every particle in the simulation.
+    - x, y, vx, vy, charge, mass and species live in separate float/int arrays
+    - the properties return zero-copy views of the live particles, so
+      in-place updates (e.g. particles.vx *= DAMPING) write straight back
+    - append/pop/clear mirror the P/E/N/V, Backspace and Ctrl+Delete
+      controls; extend adds whole arrays at once (scenes, snapshots) and
+      remove drops any set of particles (boundary eviction)
+    - version increases on every append/extend/pop/clear/remove, so caches keyed on the
+      particle set (e.g. integrator force caches) know when to rebuild
+    - edits increases on pop/clear only: while it is unchanged, entry i is
+      still the same particle (appends add at the end; remove callers remap
+      per-particle state themselves), so per-particle state can be kept
+    """
+    def __init__(self, capacity=64):
+        self.count = 0
+        self.version = 0
+        self.edits = 0
+        self._allocate(max(1, capacity))
+
+    def _allocate(self, capacity):
+        old_count = self.count
+        arrays = {}
+        for name in ("x", "y", "vx", "vy", "charge", "mass"):
+            new = np.zeros(capacity, dtype=np.float64)
+            if hasattr(self, "_" + name):
+                new[:old_count] = getattr(self, "_" + name)[:old_count]
+            arrays[name] = new
+        species = np.zeros(capacity, dtype=np.int8)
+        if hasattr(self, "_species"):
+            species[:old_count] = self._species[:old_count]
+
+        self._x, self._y = arrays["x"], arrays["y"]
+        self._vx, self._vy = arrays["vx"], arrays["vy"]
+        self._charge, self._mass = arrays["charge"], arrays["mass"]
+        self._species = species
+
+    def _reserve(self, extra):
+        needed = self.count + extra
+        capacity = len(self._x)
+        if needed > capacity:
+            while capacity < needed:
+                capacity *= 2
+            self._allocate(capacity)
+
+    # ----- Views -----
+    @property
+    def x(self):
+        return self._x[:self.count]
+
+    @property
+    def y(self):
+        return self._y[:self.count]
+
+    @property
+    def vx(self):
+        return self._vx[:self.count]
+
+    @property
+    def vy(self):
+        return self._vy[:self.count]
+
+    @property
+    def charge(self):
+        return self._charge[:self.count]
+
+    @property
+    def mass(self):
+        return self._mass[:self.count]
+
+    @property
+    def species(self):
+        return self._species[:self.count]
+
+    def __len__(self):
+        return self.count
+
+    # ----- Editing -----
+    def append(self, particle: Particles):
+        """
+        Add a particle created by one of the particles.py factories
+        (Baryon.proton, Lepton.electron, ...).
+        """
+        self._reserve(1)
+        i = self.count
+        self._x[i], self._y[i] = particle.x, particle.y
+        self._vx[i], self._vy[i] = particle.vx, particle.vy
+        self._charge[i], self._mass[i] = particle.charge, particle.mass
+        self._species[i] = SPECIES_IDS[particle.name]
+        self.count += 1
+        self.version += 1
+
+    def extend(self, species, x, y, vx=None, vy=None):
+        """
+        Append many particles at once from arrays of species ids and
+        positions (velocities default to 0). Charge and mass come from the
+        species, as with the factories.
+        """
+        species = np.asarray(species, dtype=np.int8)
+        count = len(species)
+        self._reserve(count)
+        new = slice(self.count, self.count + count)
+        self._x[new], self._y[new] = x, y
+        self._vx[new] = 0.0 if vx is None else vx
+        self._vy[new] = 0.0 if vy is None else vy
+        self._charge[new] = SPECIES_CHARGE[species]
+        self._mass[new] = SPECIES_MASS[species]
+        self._species[new] = species
+        self.count += count
+        self.version += 1
+
+    def pop(self):
+        """
+        Remove the most recently added particle and return it as a Particles object.
+        """
+        if self.count == 0:
+            raise IndexError("pop from empty Particle_Store")
+        particle = self.particle(self.count - 1)
+        self.count -= 1
+        self.version += 1
+        self.edits += 1
+        return particle
+
+    def clear(self):
+        self.count = 0
+        self.version += 1
+        self.edits += 1
+
+    def remove(self, mask):
+        """
+        Remove the particles where the bool array mask is True, keeping the
+        order of the rest. Returns how many were removed.
+        """
+        keep = np.flatnonzero(~np.asarray(mask, dtype=bool))
+        removed = self.count - len(keep)
+        if removed == 0:
+            return 0
+        for array in (self._x, self._y, self._vx, self._vy, self._charge, self._mass, self._species):
+            array[:len(keep)] = array[keep]
+        self.count = len(keep)
+        self.version += 1
+        return removed
+
+    def particle(self, i):
+        """
+        Build a standalone Particles object for entry i (a copy, not a view).
+        """
+        if not -self.count <= i < self.count:
+            raise IndexError("Particle_Store index out of range")
+        i %= self.count
+        particle = SPECIES_FACTORIES[self._species[i]](float(self._x[i]), float(self._y[i]))
+        particle.vx, particle.vy = float(self._vx[i]), float(self._vy[i])
+        particle.charge, particle.mass = float(self._charge[i]), float(self._mass[i])
+        return particle
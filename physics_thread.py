@@ -0,0 +1,158 @@
+import logging
+import queue
+import threading
+import time
+import numpy as np
+
+# -----------------------------------------------------------------------------
+# Physics on a worker thread
+# -----------------------------------------------------------------------------
+# Purpose:
+#   Decouple simulation speed from frame rate. The physics thread advances the
+#   Simulation at a fixed tick rate; the renderer draws whatever the latest
+#   state is, interpolated between the last two ticks, at its own pace.
+#
+# Details:
+#   - Scene edits (add/remove/clear) must not touch the Particle_Store while a
+#     step is running, so they are queued with submit() and applied by the
+#     physics thread between steps.
+#   - After every step the thread copies species and positions into one of
+#     three preallocated State_Buffers and publishes (previous, latest).
+#     The renderer reads them without taking a lock: each buffer has a
+#     sequence number that is odd while it is being written, and the reader
+#     retries if either buffer changed while it was interpolating.
+#   - Numpy releases the GIL inside the array kernels, so heavy force
+#     evaluation overlaps with blitting and event handling on the main thread.
+#   - If the thread falls more than MAX_CATCH_UP ticks behind it drops the
+#     backlog instead of spiralling.
+#   - An exception from a step or an edit stops the thread; it is logged and
+#     kept in error so the main loop can show it instead of a frozen scene.
+# -----------------------------------------------------------------------------
+MAX_CATCH_UP = 5
+
+
+class State_Buffer:
+    def __init__(self, capacity=64):
+        self.seq = 0
+        self.time = 0.0
+        self.step = 0
+        self.count = 0
+        self.species = np.zeros(capacity, dtype=np.int8)
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+
+    def store(self, particles, step, now):
+        count = len(particles)
+        self.seq += 1
+        if count > len(self.x):
+            capacity = max(count, 2 * len(self.x))
+            self.species = np.zeros(capacity, dtype=np.int8)
+            self.x = np.zeros(capacity)
+            self.y = np.zeros(capacity)
+        self.species[:count] = particles.species
+        self.x[:count] = particles.x
+        self.y[:count] = particles.y
+        self.count, self.step, self.time = count, step, now
+        self.seq += 1
+
+
+class Rendered_State:
+    """
+    Interpolated positions handed to the renderer (owned by the reader).
+    """
+    def __init__(self, species, x, y):
+        self.species, self.x, self.y = species, x, y
+
+    def __len__(self):
+        return len(self.x)
+
+
+class Physics_Thread(threading.Thread):
+    """
+    Steps a Simulation at tick_rate Hz on its own thread.
+    - submit(function, *args) runs a scene edit on the physics thread
+    - interpolated_state() returns positions blended between the last two ticks
+    - on_step(simulation), if given, is called on the physics thread after each step
+    - error is the exception that stopped the thread, or None
+    """
+    def __init__(self, simulation, tick_rate=60, on_step=None):
+        super().__init__(name="physics", daemon=True)
+        self.simulation = simulation
+        self.dt = 1.0 / tick_rate
+        self.on_step = on_step
+        self.error = None
+        self._commands = queue.Queue()
+        self._stop_event = threading.Event()
+        self._buffers = [State_Buffer() for _ in range(3)]
+        now = time.perf_counter()
+        self._buffers[0].store(simulation.particles, simulation.steps, now)
+        self._buffers[1].store(simulation.particles, simulation.steps, now)
+        self._published = (0, 1)
+
+    def submit(self, function, *args):
+        self._commands.put((function, args))
+
+    def stop(self):
+        self._stop_event.set()
+        if self.is_alive():
+            self.join()
+
+    def run(self):
+        try:
+            self._run()
+        except Exception as error:
+            logging.exception("Physics thread stopped")
+            self.error = error
+
+    def _run(self):
+        next_tick = time.perf_counter()
+        while not self._stop_event.is_set():
+            self._apply_commands()
+            self.simulation.step()
+            if self.on_step is not None:
+                self.on_step(self.simulation)
+            self._publish()
+
+            next_tick += self.dt
+            now = time.perf_counter()
+            if now - next_tick > MAX_CATCH_UP * self.dt:
+                next_tick = now
+            elif next_tick > now:
+                self._stop_event.wait(next_tick - now)
+        self._apply_commands()
+
+    def _apply_commands(self):
+        while True:
+            try:
+                function, args = self._commands.get_nowait()
+            except queue.Empty:
+                return
+            function(*args)
+
+    def _publish(self):
+        _, latest = self._published
+        target = 3 - sum(self._published)  # the buffer not in use
+        self._buffers[target].store(self.simulation.particles, self.simulation.steps, time.perf_counter())
+        self._published = (latest, target)
+
+    # ----- Reader side (main thread) -----
+    def interpolated_state(self):
+        while True:
+            previous_index, latest_index = self._published
+            previous, latest = self._buffers[previous_index], self._buffers[latest_index]
+            previous_seq, latest_seq = previous.seq, latest.seq
+            if previous_seq % 2 or latest_seq % 2:
+                continue
+
+            count = latest.count
+            species = latest.species[:count].copy()
+            x = latest.x[:count].copy()
+            y = latest.y[:count].copy()
+            if previous.count == count and latest.time > previous.time:
+                alpha = min(1.0, (time.perf_counter() - latest.time) / self.dt)
+                same = previous.species[:count] == species
+                x[same] = previous.x[:count][same] + (x[same] - previous.x[:count][same]) * alpha
+                y[same] = previous.y[:count][same] + (y[same] - previous.y[:count][same]) * alpha
+
+            if previous.seq == previous_seq and latest.seq == latest_seq:
+                return Rendered_State(species, x, y)
@@ -0,0 +1,227 @@
+import itertools
+import numpy as np
+import pygame
+
+# -----------------------------------------------------------------------------
+# Particle rendering
+# -----------------------------------------------------------------------------
+# Particle_Renderer.draw(screen, species, x, y, ...) -> update rects or None
+#
+# Details:
+#   - Culling:
+#       Particles whose sprite rect lies completely outside the window are
+#       skipped.
+#   - Batching:
+#       All visible particles of one species are submitted in a single
+#       Surface.blits() call instead of one blit() per particle from Python.
+#   - Dirty rectangles:
+#       When only a few particles moved since the last frame (typical once
+#       damping has settled a scene), only the old and new rects of those
+#       particles are erased and redrawn, and draw() returns the list of
+#       rects to pass to pygame.display.update(). Otherwise the whole window
+#       is cleared and redrawn and draw() returns None (update everything).
+#   - static_rects:
+#       Rects the caller redraws every frame on top of the particles (the
+#       buttons). They are erased and refreshed with the dirty rects so
+#       translucent UI is never blended over itself.
+#   - Level of detail (density mode):
+#       Above lod_count visible particles, sprites are replaced by a heatmap.
+#       Positions are binned per species into cells of cell_size pixels, each
+#       cell is coloured by mixing the species colours (the average colour of
+#       each sprite, so protons stay red and electrons blue) weighted by
+#       log-scaled counts, and the grid is written straight into the screen
+#       through a surfarray pixel view. The mode switches back below
+#       LOD_HYSTERESIS * lod_count so it doesn't flicker at the threshold.
+#       Density frames are always full redraws.
+#
+# Field overlay (Field_Overlay.draw(screen, mesh)):
+#   Draws the electric potential of the last particle-mesh solve (see
+#   particle_mesh.py) translucently over the particles: red where it is
+#   positive, blue where it is negative. Only the mesh cells inside the window
+#   are coloured, then scaled up to pixels in one smoothscale.
+# -----------------------------------------------------------------------------
+BACKGROUND = (0, 0, 0)
+LOD_COUNT = 5000
+LOD_HYSTERESIS = 0.8
+DENSITY_CELL = 4
+DENSITY_SATURATION = 16  # particles per cell for full brightness
+FIELD_ALPHA = 140
+FIELD_PERCENTILE = 99  # |potential| at this percentile is full colour
+
+
+class Particle_Renderer:
+    def __init__(self, species_images, background=BACKGROUND, dirty_fraction=0.10, max_dirty_rects=256,
+                 lod_count=LOD_COUNT, cell_size=DENSITY_CELL):
+        self.species_images = species_images
+        self.background = background
+        self.dirty_fraction = dirty_fraction
+        self.max_dirty_rects = max_dirty_rects
+        self.lod_count = lod_count
+        self.cell_size = cell_size
+        self.density_mode = False
+
+        size = max(species_images) + 1
+        self._widths = np.zeros(size, dtype=np.int64)
+        self._heights = np.zeros(size, dtype=np.int64)
+        self._colours = np.zeros((size, 3))
+        for species, image in species_images.items():
+            self._widths[species], self._heights[species] = image.get_size()
+            self._colours[species] = _average_colour(image)
+        self.invalidate()
+
+    def invalidate(self):
+        """
+        Force the next frame to be a full redraw (e.g. after a resize).
+        """
+        self._previous = None
+        self._was_forced = True
+
+    def draw(self, screen, species, x, y, full=False, static_rects=()):
+        species = np.asarray(species)
+        ix = np.asarray(x).astype(np.int64)
+        iy = np.asarray(y).astype(np.int64)
+        width, height = self._widths[species], self._heights[species]
+        screen_w, screen_h = screen.get_size()
+        visible = (ix + width > 0) & (ix < screen_w) & (iy + height > 0) & (iy < screen_h)
+
+        visible_count = int(np.count_nonzero(visible))
+        density = visible_count > (LOD_HYSTERESIS * self.lod_count if self.density_mode else self.lod_count)
+        if density != self.density_mode:
+            self.density_mode = density
+            self.invalidate()
+        if density:
+            self._previous = None
+            self._draw_density(screen, species[visible], ix[visible], iy[visible])
+            return None
+
+        dirty = None
+        if not (full or self._was_forced):
+            dirty = self._dirty_rects(species, ix, iy, width, height, visible, static_rects)
+        self._was_forced = full
+        self._previous = (species.copy(), ix, iy, visible)
+
+        if dirty is None:
+            screen.fill(self.background)
+            self._blit(screen, species, ix, iy, visible)
+            return None
+
+        for rect in dirty:
+            screen.set_clip(rect)
+            screen.fill(self.background)
+            overlap = (visible & (ix < rect.right) & (ix + width > rect.left)
+                       & (iy < rect.bottom) & (iy + height > rect.top))
+            self._blit(screen, species, ix, iy, overlap)
+        screen.set_clip(None)
+        return dirty
+
+    def _dirty_rects(self, species, ix, iy, width, height, visible, static_rects):
+        """
+        Rects that changed since the last frame, or None if a full redraw is cheaper.
+        """
+        if self._previous is None:
+            return None
+        old_species, old_x, old_y, old_visible = self._previous
+        if len(old_species) != len(species):
+            return None
+
+        moved = (ix != old_x) | (iy != old_y) | (species != old_species)
+        moved &= visible | old_visible
+        moved_count = int(np.count_nonzero(moved))
+        if moved_count > self.dirty_fraction * max(len(species), 1) or 2 * moved_count > self.max_dirty_rects:
+            return None
+
+        old_w, old_h = self._widths[old_species], self._heights[old_species]
+        rects = [pygame.Rect(r) for r in zip(old_x[moved].tolist(), old_y[moved].tolist(),
+                                              old_w[moved].tolist(), old_h[moved].tolist())]
+        rects += [pygame.Rect(r) for r in zip(ix[moved].tolist(), iy[moved].tolist(),
+                                               width[moved].tolist(), height[moved].tolist())]
+        rects += [pygame.Rect(r) for r in static_rects]
+        return rects
+
+    def _blit(self, screen, species, ix, iy, mask):
+        for species_id, image in self.species_images.items():
+            chosen = mask & (species == species_id)
+            if chosen.any():
+                positions = zip(ix[chosen].tolist(), iy[chosen].tolist())
+                screen.blits(zip(itertools.repeat(image), positions), doreturn=False)
+
+    def _draw_density(self, screen, species, ix, iy):
+        screen_w, screen_h = screen.get_size()
+        cell = self.cell_size
+        grid_w, grid_h = -(-screen_w // cell), -(-screen_h // cell)
+        # Bin around each sprite's centre, clamped onto the grid.
+        column = np.clip((ix + self._widths[species] // 2) // cell, 0, grid_w - 1)
+        row = np.clip((iy + self._heights[species] // 2) // cell, 0, grid_h - 1)
+        key = column * grid_h + row
+
+        image = np.zeros((grid_w * grid_h, 3))
+        scale = 1.0 / np.log1p(DENSITY_SATURATION)
+        for species_id in range(len(self._colours)):
+            chosen = species == species_id
+            if chosen.any():
+                counts = np.bincount(key[chosen], minlength=grid_w * grid_h)
+                image += np.minimum(np.log1p(counts) * scale, 1.0)[:, None] * self._colours[species_id]
+        image = np.where(image.any(axis=1)[:, None], image, self.background)
+        image = np.minimum(image, 255).astype(np.uint8).reshape(grid_w, grid_h, 3)
+
+        full = np.repeat(np.repeat(image, cell, axis=0), cell, axis=1)[:screen_w, :screen_h]
+        try:
+            pixels = pygame.surfarray.pixels3d(screen)
+        except ValueError:
+            # No direct pixel view for this surface format (e.g. 8-bit).
+            pygame.surfarray.blit_array(screen, full)
+            return
+        pixels[...] = full
+        del pixels  # unlock the screen
+
+
+class Field_Overlay:
+    """
+    Potential heatmap on top of the particles; visible toggles it.
+    """
+    def __init__(self, alpha=FIELD_ALPHA, visible=False):
+        self.alpha = alpha
+        self.visible = visible
+
+    def draw(self, screen, mesh):
+        solved = mesh.potential()
+        if solved is None:
+            return
+        grid, (x0, y0), cell = solved
+        screen_w, screen_h = screen.get_size()
+        nx, ny = grid.shape
+        i0 = int(np.clip(np.floor(-x0 / cell), 0, nx))
+        i1 = int(np.clip(np.ceil((screen_w - x0) / cell) + 1, i0, nx))
+        j0 = int(np.clip(np.floor(-y0 / cell), 0, ny))
+        j1 = int(np.clip(np.ceil((screen_h - y0) / cell) + 1, j0, ny))
+        if i1 - i0 < 2 or j1 - j0 < 2:
+            return
+
+        shown = grid[i0:i1, j0:j1]
+        scale = np.percentile(np.abs(shown), FIELD_PERCENTILE)
+        if scale <= 0:
+            return
+        value = np.clip(shown / scale, -1.0, 1.0)
+        rgb = np.zeros(shown.shape + (3,), dtype=np.uint8)
+        rgb[..., 0] = 255 * np.maximum(value, 0.0)
+        rgb[..., 2] = 255 * np.maximum(-value, 0.0)
+        rgb[..., 1] = 64 * np.abs(value)
+
+        size = (int((i1 - i0 - 1) * cell), int((j1 - j0 - 1) * cell))
+        image = pygame.transform.smoothscale(pygame.surfarray.make_surface(rgb), size)
+        image.set_alpha(self.alpha)
+        screen.blit(image, (int(x0 + i0 * cell), int(y0 + j0 * cell)))
+
+
+def _average_colour(image):
+    """
+    Mean colour of the opaque pixels of a sprite.
+    """
+    rgb = pygame.surfarray.array3d(image).reshape(-1, 3).astype(float)
+    alpha = pygame.surfarray.array_alpha(image).reshape(-1).astype(float)
+    if alpha.sum() == 0:
+        return np.full(3, 255.0)
+    colour = (rgb * alpha[:, None]).sum(axis=0) / alpha.sum()
+    # Stretch so the brightest channel is full intensity: cells at saturation
+    # then look like the sprite rather than a darker shade of it.
+    return colour * (255.0 / max(colour.max(), 1.0))
@@ -0,0 +1,101 @@
+import numpy as np
+from particle_store import Particle_Store, PROTON, NEUTRON, ELECTRON, NEUTRINO, SPECIES_MASS
+
+# -----------------------------------------------------------------------------
+# Synthetic scene generators
+# -----------------------------------------------------------------------------
+# Each generator returns a Particle_Store filled in bulk by species id, so the
+# entries are exactly what the P/E/N/V keys would create (charge and mass come
+# from the particles.py factories).
+#
+#   - mixed_scene:    protons, neutrons, electrons and neutrinos scattered
+#                     uniformly over the window.
+#   - dense_nuclei:   baryons packed into small clumps with a few electrons.
+#   - sparse_gas:     particles spread over an area much larger than the window.
+#   - nuclei_lattice: nuclei of nucleus_size baryons on a regular grid.
+#   - electron_gas:   electrons only, uniform, with random thermal velocities.
+#   - plasma:         equal numbers of protons and electrons, uniform, with
+#                     thermal velocities (electrons faster, being lighter).
+#
+# All generators take a seed so the same scene can be rebuilt between runs.
+# -----------------------------------------------------------------------------
+WIDTH, HEIGHT = 1280, 720
+SPECIES = (PROTON, NEUTRON, ELECTRON, NEUTRINO)
+
+
+def _fill(store, species, x, y, vx=None, vy=None):
+    store.extend(species, x, y, vx, vy)
+    return store
+
+
+def mixed_scene(count, width=WIDTH, height=HEIGHT, seed=0):
+    rng = np.random.default_rng(seed)
+    species = rng.integers(0, len(SPECIES), count)
+    return _fill(Particle_Store(count), species, rng.uniform(0, width, count), rng.uniform(0, height, count))
+
+
+def dense_nuclei(count, width=WIDTH, height=HEIGHT, seed=0, nucleus_size=12, radius=20):
+    rng = np.random.default_rng(seed)
+    nuclei = max(1, count // nucleus_size)
+    centre = rng.integers(0, nuclei, count)
+    centre_x = rng.uniform(radius, width - radius, nuclei)
+    centre_y = rng.uniform(radius, height - radius, nuclei)
+    angle = rng.uniform(0, 2 * np.pi, count)
+    distance = radius * np.sqrt(rng.uniform(0, 1, count))
+    # Mostly protons and neutrons, about one electron in ten.
+    species = rng.choice(3, count, p=(0.45, 0.45, 0.10))
+    return _fill(Particle_Store(count), species,
+                 centre_x[centre] + distance * np.cos(angle), centre_y[centre] + distance * np.sin(angle))
+
+
+def sparse_gas(count, width=WIDTH, height=HEIGHT, seed=0, spread=4):
+    rng = np.random.default_rng(seed)
+    species = rng.integers(0, len(SPECIES), count)
+    return _fill(Particle_Store(count), species,
+                 rng.uniform(-width * (spread - 1) / 2, width * (spread + 1) / 2, count),
+                 rng.uniform(-height * (spread - 1) / 2, height * (spread + 1) / 2, count))
+
+
+def nuclei_lattice(count, width=WIDTH, height=HEIGHT, seed=0, nucleus_size=8, radius=4):
+    rng = np.random.default_rng(seed)
+    nuclei = max(1, -(-count // nucleus_size))
+    # Grid with the window's aspect ratio and at least `nuclei` sites.
+    columns = max(1, int(np.ceil(np.sqrt(nuclei * width / height))))
+    rows = -(-nuclei // columns)
+    site = np.arange(count) // nucleus_size
+    centre_x = (site % columns + 0.5) * width / columns
+    centre_y = (site // columns + 0.5) * height / rows
+    angle = rng.uniform(0, 2 * np.pi, count)
+    distance = radius * np.sqrt(rng.uniform(0, 1, count))
+    # Alternate protons and neutrons inside each nucleus.
+    species = np.where(np.arange(count) % 2 == 0, PROTON, NEUTRON)
+    return _fill(Particle_Store(count), species,
+                 centre_x + distance * np.cos(angle), centre_y + distance * np.sin(angle))
+
+
+def electron_gas(count, width=WIDTH, height=HEIGHT, seed=0, speed=1.0):
+    rng = np.random.default_rng(seed)
+    return _fill(Particle_Store(count), np.full(count, ELECTRON),
+                 rng.uniform(0, width, count), rng.uniform(0, height, count),
+                 rng.normal(0, speed, count), rng.normal(0, speed, count))
+
+
+def plasma(count, width=WIDTH, height=HEIGHT, seed=0, speed=0.2):
+    rng = np.random.default_rng(seed)
+    species = np.where(np.arange(count) % 2 == 0, PROTON, ELECTRON)
+    # Same temperature for both species: speed scales with 1 / sqrt(mass).
+    electron_speed = speed * np.sqrt(SPECIES_MASS[PROTON] / SPECIES_MASS[ELECTRON])
+    sigma = np.where(species == ELECTRON, electron_speed, speed)
+    return _fill(Particle_Store(count), species,
+                 rng.uniform(0, width, count), rng.uniform(0, height, count),
+                 rng.normal(0, 1, count) * sigma, rng.normal(0, 1, count) * sigma)
+
+
+SCENES = {
+    "mixed": mixed_scene,
+    "nuclei": dense_nuclei,
+    "gas": sparse_gas,
+    "lattice": nuclei_lattice,
+    "electrons": electron_gas,
+    "plasma": plasma,
+}
@@ -0,0 +1,223 @@
+import numpy as np
+from forces import Electromagnetic_force, strong_nuclear_force, Force_Field
+from particle_store import Particle_Store
+from integrators import Legacy_Integrator
+
+# -----------------------------------------------------------------------------
+# Headless simulation engine
+# -----------------------------------------------------------------------------
+# Purpose:
+#   Own the particle state, the force models and the integration step so the
+#   physics can run without a window and faster than real time. main.py is a
+#   viewer on top of this; batch jobs can call step(n) directly.
+#
+# Integration (one step):
+#   Delegated to simulation.integrator (see integrators.py). The default
+#   Legacy_Integrator is the original update done by integrate():
+#   1) Net force = electromagnetic + strong (+ extra_forces), evaluated in
+#      one fused pass by simulation.force_field.
+#   2) a = F / m (massless particles use the fallback a = (1, 1)).
+#   3) v += a, then v *= damping, then cap |v| at max_speed.
+#   4) x += v.
+# -----------------------------------------------------------------------------
+MAX_SPEED = 25
+DAMPING = 0.20
+
+# -----------------------------------------------------------------------------
+# Tunable parameters by name
+# -----------------------------------------------------------------------------
+# The names match the constructor arguments of the force models (and the
+# integration constants above) so parameter sets can be written as plain
+# dictionaries, e.g. {"COLOUMBS_CONSTANT": 70, "DAMPING": 0.2}.
+# -----------------------------------------------------------------------------
+EM_PARAMETERS = ("COLOUMBS_CONSTANT",)
+STRONG_PARAMETERS = ("H_BAR", "E", "COUPLING_CONSTANT", "SPEED_OF_LIGHT", "MASS_CHARGED_PION")
+INTEGRATION_PARAMETERS = ("DAMPING", "MAX_SPEED")
+PARAMETERS = EM_PARAMETERS + STRONG_PARAMETERS + INTEGRATION_PARAMETERS
+
+
+class Simulation:
+    """
+    Particle state plus the physics that advances it.
+    - add_particle / remove_last / clear edit the scene
+    - step(n) advances n integration steps
+    - time is the simulated time in frames; force_evaluations counts
+      per-particle force evaluations, for comparing integrators
+    - extra_forces: further models for the force field, e.g.
+      forces.Radial_force for custom laws
+    - coarsening: optional coarsening.Cluster_Coarsening; stable nuclei are
+      then seen as single composite bodies by distant particles
+    - sleeping: optional sleeping.Sleep_Tracker; particles at rest are frozen
+      and forces are updated incrementally. Both replace the full force
+      evaluation, so sleeping and coarsening can't be combined (ValueError).
+    - boundary: optional boundaries.Domain_Boundary applied after every step
+      (reflect, periodic or evict)
+    - workers: threads for the all-pairs force sums (None = all cores)
+    """
+    def __init__(self, em_force=None, strong_force=None, damping=DAMPING, max_speed=MAX_SPEED, particles=None,
+                 integrator=None, extra_forces=(), coarsening=None, sleeping=None, boundary=None, workers=None):
+        if coarsening is not None and sleeping is not None:
+            raise ValueError("Simulation can't use both coarsening and sleeping")
+        self.particles = particles if particles is not None else Particle_Store()
+        self.em_force = em_force if em_force is not None else Electromagnetic_force()
+        self.strong_force = strong_force if strong_force is not None else strong_nuclear_force()
+        self.integrator = integrator if integrator is not None else Legacy_Integrator()
+        self.force_field = Force_Field([self.em_force, self.strong_force, *extra_forces], workers)
+        self.coarsening = coarsening
+        self.sleeping = sleeping
+        self.boundary = boundary
+        self.damping = damping
+        self.max_speed = max_speed
+        self.steps = 0
+        self.time = 0.0
+        self.force_evaluations = 0
+
+    @classmethod
+    def from_parameters(cls, parameters, particles=None, workers=None):
+        """
+        Build a Simulation from a {name: value} dict of PARAMETERS. Missing
+        names keep their defaults; unknown names raise ValueError. workers
+        limits the force threads (None = all cores).
+        """
+        unknown = set(parameters) - set(PARAMETERS)
+        if unknown:
+            raise ValueError(f"Unknown simulation parameters: {', '.join(sorted(unknown))}")
+        em_force = Electromagnetic_force(workers=workers,
+                                         **{k: parameters[k] for k in EM_PARAMETERS if k in parameters})
+        strong_force = strong_nuclear_force(workers=workers,
+                                            **{k: parameters[k] for k in STRONG_PARAMETERS if k in parameters})
+        return cls(em_force, strong_force,
+                   damping=parameters.get("DAMPING", DAMPING),
+                   max_speed=parameters.get("MAX_SPEED", MAX_SPEED),
+                   particles=particles, workers=workers)
+
+    def apply_parameters(self, parameters):
+        """
+        Set PARAMETERS from a {name: value} dict on the existing force models
+        (e.g. when loading a snapshot). Unknown names raise ValueError.
+        """
+        unknown = set(parameters) - set(PARAMETERS)
+        if unknown:
+            raise ValueError(f"Unknown simulation parameters: {', '.join(sorted(unknown))}")
+        for name, value in parameters.items():
+            if name in EM_PARAMETERS:
+                setattr(self.em_force, name, value)
+            elif name in STRONG_PARAMETERS:
+                setattr(self.strong_force, name, value)
+        self.damping = parameters.get("DAMPING", self.damping)
+        self.max_speed = parameters.get("MAX_SPEED", self.max_speed)
+
+    def parameters(self):
+        """
+        Current values of PARAMETERS as a {name: value} dict.
+        """
+        values = {name: getattr(self.em_force, name) for name in EM_PARAMETERS}
+        values.update({name: getattr(self.strong_force, name) for name in STRONG_PARAMETERS})
+        values.update(DAMPING=self.damping, MAX_SPEED=self.max_speed)
+        return values
+
+    def kinetic_energy(self):
+        particles = self.particles
+        return float(0.5 * np.sum(particles.mass * (particles.vx ** 2 + particles.vy ** 2)))
+
+    # ----- Scene editing -----
+    def add_particle(self, particle):
+        """
+        Add a particle made by a particles.py factory, e.g. Baryon.proton(x, y).
+        """
+        self.particles.append(particle)
+
+    def remove_last(self):
+        """
+        Remove the most recently added particle. Returns it, or None if empty.
+        """
+        if len(self.particles) == 0:
+            return None
+        return self.particles.pop()
+
+    def clear(self):
+        self.particles.clear()
+
+    def remove_particles(self, mask):
+        """
+        Remove the particles where mask is True (e.g. evicted by the
+        boundary), keeping the per-particle state of the rest. Returns how
+        many were removed.
+        """
+        mask = np.asarray(mask, dtype=bool)
+        removed = self.particles.remove(mask)
+        if removed:
+            for tracker in (self.sleeping, self.coarsening):
+                if tracker is not None:
+                    tracker.remove(~mask)
+        return removed
+
+    # ----- Physics -----
+    def compute_forces(self, targets=None):
+        """
+        Net force on every particle, or only on the index array targets
+        (other entries are zero). Sleeping and coarsening only apply to full
+        evaluations.
+        """
+        particles = self.particles
+        self.force_field.period = None if self.boundary is None else self.boundary.period
+        if self.sleeping is not None and targets is None:
+            fx, fy = self.sleeping.net_force(self.force_field, particles)
+        elif self.coarsening is not None and targets is None:
+            fx, fy = self.coarsening.net_force(self.force_field, particles)
+        else:
+            fx, fy = self.force_field.calculate_net_force_arrays(
+                particles.x, particles.y, particles.charge, particles.mass, targets=targets)
+        self.force_evaluations += len(particles) if targets is None else len(targets)
+        return fx, fy
+
+    def step(self, n=1):
+        for _ in range(n):
+            self._step_once()
+
+    def _step_once(self):
+        if len(self.particles):
+            if self.coarsening is not None:
+                self.coarsening.update(self.particles)
+            if self.sleeping is None:
+                self.integrator.step(self)
+            elif self.sleeping.idle(self.particles) and self.sleeping.interacting.all():
+                # Everything is at rest: nothing to integrate.
+                self.time += getattr(self.integrator, "dt", 1.0)
+            else:
+                self.sleeping.before_step(self.particles)
+                self.integrator.step(self)
+                self.sleeping.after_step(self.particles)
+            if self.boundary is not None:
+                self.boundary.apply(self)
+        self.steps += 1
+
+    def integrate(self, fx, fy):
+        """
+        Apply one step of the damped, speed-capped update for net forces fx, fy.
+        """
+        particles = self.particles
+
+        # The views alias the store, so the in-place updates write straight back.
+        x, y, vx, vy, mass = particles.x, particles.y, particles.vx, particles.vy, particles.mass
+
+        # Acceleration from net force
+        massive = mass != 0
+        ax = np.divide(fx, mass, out=np.ones_like(fx), where=massive)
+        ay = np.divide(fy, mass, out=np.ones_like(fy), where=massive)
+
+        # Velocity update, damping and speed cap
+        vx += ax
+        vy += ay
+        vx *= self.damping
+        vy *= self.damping
+
+        speed = np.hypot(vx, vy)
+        too_fast = speed > self.max_speed
+        scale = self.max_speed / speed[too_fast]
+        vx[too_fast] *= scale
+        vy[too_fast] *= scale
+
+        # Position update
+        x += vx
+        y += vy
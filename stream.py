@@ -0,0 +1,322 @@
+import argparse
+import asyncio
+import json
+import logging
+import struct
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from boundaries import Domain_Boundary, POLICIES
+from forces import Electromagnetic_force
+from integrators import INTEGRATORS
+from physics_thread import Rendered_State
+from scenes import SCENES, WIDTH, HEIGHT
+from simulation import Simulation
+from snapshot import read_snapshot, restore_snapshot
+
+# -----------------------------------------------------------------------------
+# State streaming over TCP
+# -----------------------------------------------------------------------------
+# Purpose:
+#   Run a large simulation headless on one machine and watch it from others:
+#   Stream_Server steps the Simulation and broadcasts every tick to any number
+#   of viewers; Stream_Client receives them for the pygame front end
+#   (main.py --connect HOST:PORT).
+#
+# Wire format (little-endian):
+#   hello:    MAGIC (8 bytes) | uint32 length | JSON {"version", "quantum",
+#             "width", "height", "tick_rate"}
+#   frame:    uint32 length | uint8 flags | uint32 step | uint32 count |
+#             uint32 base | zlib(species | dx int32[count] | dy int32[count])
+#
+# Details:
+#   - Positions are quantised to 1 / QUANTUM pixel and sent as int32.
+#     Positions beyond the int32 range (particles that escaped far outside
+#     the domain) are clamped to its ends instead of wrapping around. The
+#     client rejects a hello with another VERSION and scales positions by
+#     the quantum the server announces.
+#   - Every frame is a delta against the last frame *this client* received:
+#     the first base entries are differences, the rest absolute values, so a
+#     settled scene compresses to almost nothing. species is only the new
+#     tail (entries base..count) unless flags & FULL_SPECIES, when the
+#     species of existing entries changed (removals, clears). The first
+#     frame has base 0, i.e. is a keyframe.
+#   - Each client has its own sender task that always encodes the latest
+#     tick. While a slow client is still draining the previous frame, newer
+#     ticks simply replace each other, so it skips frames instead of queueing
+#     them, and it never holds up the physics or the other clients.
+#   - Simulation steps and frame encoding run in the default executor; numpy
+#     and zlib release the GIL, so network I/O continues meanwhile.
+# -----------------------------------------------------------------------------
+MAGIC = b"PPSTRM01"
+VERSION = 1
+PORT = 8765
+QUANTUM = 8  # steps per pixel
+FULL_SPECIES = 1
+WRITE_BUFFER_LIMIT = 1 << 16
+MAX_CATCH_UP = 5
+
+_FRAME_HEADER = struct.Struct("<BIII")
+_LENGTH = struct.Struct("<I")
+
+
+class Frame:
+    """
+    One published tick: step, species and quantised positions (owned copies).
+    """
+    def __init__(self, step, species, qx, qy):
+        self.step = step
+        self.species = species
+        self.qx = qx
+        self.qy = qy
+
+    @classmethod
+    def capture(cls, particles, step):
+        return cls(step, particles.species.copy(), _quantise(particles.x), _quantise(particles.y))
+
+
+def _quantise(position):
+    limits = np.iinfo(np.int32)
+    return np.clip(np.round(position * QUANTUM), limits.min, limits.max).astype(np.int32)
+
+
+EMPTY_FRAME = Frame(0, np.zeros(0, dtype=np.int8), np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32))
+
+
+def encode_frame(frame, base):
+    """
+    Frame message for a client that last received base (EMPTY_FRAME at first).
+    """
+    count = len(frame.species)
+    shared = min(count, len(base.species))
+    flags = 0
+    if np.array_equal(frame.species[:shared], base.species[:shared]):
+        species = frame.species[shared:]
+    else:
+        flags |= FULL_SPECIES
+        species = frame.species
+    dx = frame.qx.copy()
+    dy = frame.qy.copy()
+    dx[:shared] -= base.qx[:shared]
+    dy[:shared] -= base.qy[:shared]
+    body = zlib.compress(species.tobytes() + dx.tobytes() + dy.tobytes(), 1)
+    payload = _FRAME_HEADER.pack(flags, frame.step, count, shared) + body
+    return _LENGTH.pack(len(payload)) + payload
+
+
+def decode_frame(payload, base):
+    """
+    Inverse of encode_frame: the new Frame given the previous one.
+    """
+    flags, step, count, shared = _FRAME_HEADER.unpack_from(payload)
+    body = zlib.decompress(payload[_FRAME_HEADER.size:])
+    species_count = count if flags & FULL_SPECIES else count - shared
+    species = np.frombuffer(body, dtype=np.int8, count=species_count)
+    if not flags & FULL_SPECIES:
+        species = np.concatenate([base.species[:shared], species])
+    offset = species_count
+    qx = np.frombuffer(body, dtype="<i4", count=count, offset=offset).copy()
+    qy = np.frombuffer(body, dtype="<i4", count=count, offset=offset + 4 * count).copy()
+    qx[:shared] += base.qx[:shared]
+    qy[:shared] += base.qy[:shared]
+    return Frame(step, species, qx, qy)
+
+
+class Stream_Server:
+    """
+    Steps simulation at tick_rate Hz and streams it to every connected client.
+    - await serve() runs until the task is cancelled
+    - clients, frames_sent and frames_skipped are for logging/monitoring
+    """
+    def __init__(self, simulation, host="0.0.0.0", port=PORT, tick_rate=60, width=WIDTH, height=HEIGHT):
+        self.simulation = simulation
+        self.host = host
+        self.port = port
+        self.dt = 1.0 / tick_rate
+        self.tick_rate = tick_rate
+        self.width = width
+        self.height = height
+        self.clients = 0
+        self.frames_sent = 0
+        self.frames_skipped = 0
+        self._latest = Frame.capture(simulation.particles, simulation.steps)
+        self._wakeups = set()
+
+    async def serve(self):
+        server = await asyncio.start_server(self._client, self.host, self.port)
+        logging.info(f"Streaming on {self.host}:{self.port}")
+        async with server:
+            await self._physics()
+
+    def _step(self):
+        self.simulation.step()
+        return Frame.capture(self.simulation.particles, self.simulation.steps)
+
+    async def _physics(self):
+        loop = asyncio.get_running_loop()
+        next_tick = time.perf_counter()
+        while True:
+            self._latest = await loop.run_in_executor(None, self._step)
+            for wakeup in self._wakeups:
+                wakeup.set()
+
+            next_tick += self.dt
+            now = time.perf_counter()
+            if now - next_tick > MAX_CATCH_UP * self.dt:
+                next_tick = now
+            await asyncio.sleep(max(0.0, next_tick - now))
+
+    async def _client(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        peer = writer.get_extra_info("peername")
+        wakeup = asyncio.Event()
+        wakeup.set()
+        self._wakeups.add(wakeup)
+        self.clients += 1
+        writer.transport.set_write_buffer_limits(high=WRITE_BUFFER_LIMIT)
+        logging.info(f"Stream client connected: {peer}")
+        try:
+            hello = json.dumps({"version": VERSION, "quantum": QUANTUM, "width": self.width,
+                                "height": self.height, "tick_rate": self.tick_rate}).encode("utf-8")
+            writer.write(MAGIC + _LENGTH.pack(len(hello)) + hello)
+            base = EMPTY_FRAME
+            while True:
+                await wakeup.wait()
+                wakeup.clear()
+                frame = self._latest
+                if base is not EMPTY_FRAME and frame.step > base.step + 1:
+                    self.frames_skipped += frame.step - base.step - 1
+                message = await loop.run_in_executor(None, encode_frame, frame, base)
+                writer.write(message)
+                await writer.drain()
+                base = frame
+                self.frames_sent += 1
+        except (ConnectionError, OSError) as error:
+            logging.info(f"Stream client {peer} disconnected: {error}")
+        finally:
+            self._wakeups.discard(wakeup)
+            self.clients -= 1
+            writer.close()
+
+
+def _check_hello(info):
+    version = info.get("version") if isinstance(info, dict) else None
+    if version != VERSION:
+        raise ValueError(f"unsupported stream version {version!r} (expected {VERSION})")
+    quantum = info.get("quantum")
+    if not isinstance(quantum, (int, float)) or quantum <= 0:
+        raise ValueError(f"bad stream quantum {quantum!r}")
+    return info
+
+
+class Stream_Client:
+    """
+    Receives a stream on a background thread.
+    - state() -> Rendered_State of the latest frame (species, x, y)
+    - step is the server step of that frame; info the server's hello
+    - error is set if the connection failed or was lost, or the server
+      speaks another protocol VERSION
+    """
+    def __init__(self, host, port=PORT):
+        self.host = host
+        self.port = port
+        self.info = None
+        self.quantum = QUANTUM
+        self.error = None
+        self.step = 0
+        self.frames_received = 0
+        self._frame = EMPTY_FRAME
+        self._loop = None
+        self._task = None
+        self._thread = threading.Thread(target=self._run, name="stream-client", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def close(self):
+        if self._loop is not None and self._task is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._task.cancel)
+            except RuntimeError:
+                pass  # the receiver already ended (e.g. failed to connect) and closed its loop
+        self._thread.join(timeout=1.0)
+
+    def state(self):
+        frame = self._frame
+        return Rendered_State(frame.species, frame.qx / self.quantum, frame.qy / self.quantum)
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        self._task = self._loop.create_task(self._receive())
+        try:
+            self._loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._loop.close()
+
+    async def _receive(self):
+        try:
+            reader, writer = await asyncio.open_connection(self.host, self.port)
+        except OSError as error:
+            self.error = error
+            logging.error(f"Failed to connect to {self.host}:{self.port}: {error}")
+            return
+        try:
+            if await reader.readexactly(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{self.host}:{self.port} is not a particle stream")
+            length = _LENGTH.unpack(await reader.readexactly(_LENGTH.size))[0]
+            self.info = _check_hello(json.loads(await reader.readexactly(length)))
+            self.quantum = self.info["quantum"]
+            while True:
+                length = _LENGTH.unpack(await reader.readexactly(_LENGTH.size))[0]
+                payload = await reader.readexactly(length)
+                self._frame = decode_frame(payload, self._frame)
+                self.step = self._frame.step
+                self.frames_received += 1
+        except (asyncio.IncompleteReadError, ConnectionError, OSError, ValueError, zlib.error) as error:
+            self.error = error
+            logging.error(f"Stream from {self.host}:{self.port} ended: {error}")
+        finally:
+            writer.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a simulation headless and stream it to viewers.")
+    parser.add_argument("--host", default="0.0.0.0", help="address to listen on")
+    parser.add_argument("--port", type=int, default=PORT, help="TCP port")
+    parser.add_argument("--tick-rate", type=float, default=60, help="simulation steps per second")
+    parser.add_argument("--width", type=int, default=WIDTH, help="domain width for scenes and boundaries")
+    parser.add_argument("--height", type=int, default=HEIGHT, help="domain height for scenes and boundaries")
+    parser.add_argument("--scene", choices=sorted(SCENES), default="mixed", help="generated starting scene")
+    parser.add_argument("--count", type=int, default=1000, help="particles in the generated scene")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for the generated scene")
+    parser.add_argument("--load", metavar="PATH", help="start from a saved snapshot instead")
+    parser.add_argument("--integrator", choices=sorted(INTEGRATORS), default="legacy", help="integration scheme")
+    parser.add_argument("--em-mode", choices=Electromagnetic_force.MODES, default="direct",
+                        help="Coulomb force algorithm")
+    parser.add_argument("--boundary", choices=POLICIES + ("none",), default="none", help="domain edge policy")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    boundary = None if args.boundary == "none" else Domain_Boundary(args.boundary, args.width, args.height)
+    simulation = Simulation(em_force=Electromagnetic_force(mode=args.em_mode),
+                            integrator=INTEGRATORS[args.integrator](), boundary=boundary)
+    if args.load:
+        restore_snapshot(simulation, read_snapshot(args.load))
+    else:
+        generated = SCENES[args.scene](args.count, width=args.width, height=args.height, seed=args.seed)
+        simulation.particles.extend(generated.species, generated.x, generated.y, generated.vx, generated.vy)
+
+    server = Stream_Server(simulation, args.host, args.port, args.tick_rate, args.width, args.height)
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
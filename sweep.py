@@ -0,0 +1,153 @@
+import argparse
+import itertools
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from clusters import count_clusters, LINK_DISTANCE
+from particle_store import SPECIES_FACTORIES, SPECIES_IDS
+from simulation import Simulation, PARAMETERS
+
+# -----------------------------------------------------------------------------
+# Parameter sweep runner
+# -----------------------------------------------------------------------------
+# Runs the same starting scene headlessly under many parameter sets, one
+# process per configuration, and writes one row of summary metrics per run
+# into a single columnar .npz file.
+#
+# Usage examples:
+#   python sweep.py --scene scene.json --set COLOUMBS_CONSTANT=50,70,90 \
+#                   --set DAMPING=0.2,0.5 --steps 500
+#   python sweep.py --random-scene 300 --grid grid.json --output results.npz
+#
+# Inputs:
+#   - Scene JSON: a list of {"species": "proton", "x": 10, "y": 20} entries
+#     (optional "vx"/"vy").
+#   - Grid JSON: either {"NAME": [v1, v2, ...], ...} (every combination is
+#     run) or a list of {"NAME": value, ...} parameter sets.
+#   - Parameter names are simulation.PARAMETERS (force constants, DAMPING and
+#     MAX_SPEED).
+#
+# Output columns (one entry per run, in run order):
+#   run, each swept parameter, kinetic_energy, cluster_count, wall_time,
+#   final_x and final_y (runs x particles).
+# -----------------------------------------------------------------------------
+
+
+def load_scene(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def random_scene(count, width=1280, height=720, seed=0):
+    rng = random.Random(seed)
+    return [{"species": rng.choice(("proton", "neutron", "electron", "neutrino")),
+             "x": rng.uniform(0, width), "y": rng.uniform(0, height)}
+            for _ in range(count)]
+
+
+def build_simulation(parameters, scene, workers=None):
+    simulation = Simulation.from_parameters(parameters, workers=workers)
+    for entry in scene:
+        particle = SPECIES_FACTORIES[SPECIES_IDS[entry["species"]]](entry["x"], entry["y"])
+        particle.vx = entry.get("vx", 0)
+        particle.vy = entry.get("vy", 0)
+        simulation.add_particle(particle)
+    return simulation
+
+
+def expand_grid(grid):
+    """
+    Turn a grid description into a list of parameter dicts.
+    """
+    if isinstance(grid, list):
+        return [dict(parameters) for parameters in grid]
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def run_configuration(parameters, scene, steps, link_distance=LINK_DISTANCE):
+    """
+    Run one configuration to completion and return its summary metrics.
+    Top-level so it can be sent to worker processes. Each process already
+    has a core, so the force sums run single-threaded.
+    """
+    simulation = build_simulation(parameters, scene, workers=1)
+    start = time.perf_counter()
+    simulation.step(steps)
+    wall_time = time.perf_counter() - start
+
+    particles = simulation.particles
+    return {
+        "kinetic_energy": simulation.kinetic_energy(),
+        "cluster_count": count_clusters(particles.x, particles.y, link_distance),
+        "wall_time": wall_time,
+        "final_x": particles.x.copy(),
+        "final_y": particles.y.copy(),
+    }
+
+
+def run_sweep(parameter_sets, scene, steps, workers=None, link_distance=LINK_DISTANCE):
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = [pool.submit(run_configuration, parameters, scene, steps, link_distance)
+                   for parameters in parameter_sets]
+        return [future.result() for future in futures]
+
+
+def write_results(path, parameter_sets, results):
+    names = sorted({name for parameters in parameter_sets for name in parameters})
+    columns = {"run": np.arange(len(results))}
+    for name in names:
+        columns[name] = np.array([parameters.get(name, np.nan) for parameters in parameter_sets], dtype=float)
+    columns["kinetic_energy"] = np.array([r["kinetic_energy"] for r in results])
+    columns["cluster_count"] = np.array([r["cluster_count"] for r in results])
+    columns["wall_time"] = np.array([r["wall_time"] for r in results])
+    columns["final_x"] = np.stack([r["final_x"] for r in results]) if results else np.zeros((0, 0))
+    columns["final_y"] = np.stack([r["final_y"] for r in results]) if results else np.zeros((0, 0))
+    np.savez(path, **columns)
+
+
+def _parse_set(option):
+    name, _, values = option.partition("=")
+    if name not in PARAMETERS or not values:
+        raise argparse.ArgumentTypeError(f"expected NAME=v1,v2,... with NAME in {', '.join(PARAMETERS)}")
+    return name, [float(value) for value in values.split(",")]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the particle simulation headlessly over a parameter grid.")
+    scene_group = parser.add_mutually_exclusive_group(required=True)
+    scene_group.add_argument("--scene", help="scene JSON file")
+    scene_group.add_argument("--random-scene", type=int, metavar="N", help="use N random particles")
+    parser.add_argument("--seed", type=int, default=0, help="seed for --random-scene")
+    parser.add_argument("--grid", help="grid JSON file")
+    parser.add_argument("--set", type=_parse_set, action="append", default=[], metavar="NAME=v1,v2",
+                        help="values for one parameter (repeatable, combined with --grid)")
+    parser.add_argument("--steps", type=int, default=600, help="integration steps per run")
+    parser.add_argument("--workers", type=int, default=None, help="process count (default: all cores)")
+    parser.add_argument("--link-distance", type=float, default=LINK_DISTANCE, help="cluster link distance")
+    parser.add_argument("--output", default="sweep_results.npz", help="results file")
+    args = parser.parse_args(argv)
+
+    scene = load_scene(args.scene) if args.scene else random_scene(args.random_scene, seed=args.seed)
+
+    grid = {}
+    if args.grid:
+        with open(args.grid, encoding="utf-8") as f:
+            grid = json.load(f)
+    parameter_sets = expand_grid(grid)
+    if args.set:
+        extra = expand_grid(dict(args.set))
+        parameter_sets = [{**base, **more} for base in parameter_sets for more in extra]
+
+    results = run_sweep(parameter_sets, scene, args.steps, args.workers, args.link_distance)
+    write_results(args.output, parameter_sets, results)
+    print(f"{len(results)} runs written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
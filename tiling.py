@@ -0,0 +1,132 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+# -----------------------------------------------------------------------------
+# Tiled multi-core pairwise evaluation
+# -----------------------------------------------------------------------------
+# Purpose:
+#   Spread the all-pairs force computation over several cores.
+#
+# Details:
+#   - The upper triangle of the i x j interaction matrix is cut into
+#     TILE x TILE blocks. Each block is one task: it computes the pair forces
+#     once and returns partial sums for its rows (+) and columns (-), which is
+#     Newton's third law as in forces._pairwise_net_force.
+#   - Tasks run on a thread pool. Numpy releases the GIL inside the array
+#     maths, so the threads really run in parallel.
+#   - Partial sums are reduced in tile order, not completion order, so the
+#     result is bitwise identical from run to run and for any worker count
+#     (forces._direct_net_force sends single-threaded large scenes through
+#     the same tiles).
+#   - Pools are created once per worker count and kept for the life of the
+#     process, so no threads are started per frame.
+#   - Scenes below PARALLEL_MIN_PARTICLES are not worth the dispatch overhead;
+#     the force models keep them on the single-threaded path.
+#   - block_net_force takes several blocks, each with its own pair_scale, so
+#     forces.Force_Field can give each pair of particle groups only the force
+#     models that apply to it.
+#   - period = (width, height) uses minimum-image separations for periodic
+#     domains (see boundaries.py): each pair interacts through its nearest
+#     copy only.
+# -----------------------------------------------------------------------------
+TILE = 512
+PARALLEL_MIN_PARTICLES = 2048
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+def get_pool(workers):
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="force-tile")
+            _pools[workers] = pool
+        return pool
+
+
+def minimum_image(dx, dy, period):
+    """
+    Wrap separations in place onto the nearest periodic copy (period None: no-op).
+    """
+    if period is not None:
+        width, height = period
+        dx -= width * np.round(dx / width)
+        dy -= height * np.round(dy / height)
+
+
+def pair_distance(dx, dy, pair_scale):
+    """
+    What pair_scale is called with: r² if it takes squared distances (its
+    squared attribute is set, e.g. table lookups), otherwise r.
+    """
+    squared = dx * dx
+    squared += dy * dy
+    if getattr(pair_scale, "squared", False):
+        return squared
+    return np.sqrt(squared, out=squared)
+
+
+def _tile(x, y, pair_scale, row_start, row_stop, col_start, col_stop, period=None):
+    rows, cols = slice(row_start, row_stop), slice(col_start, col_stop)
+    dx = x[cols][None, :] - x[rows][:, None]
+    dy = y[cols][None, :] - y[rows][:, None]
+    minimum_image(dx, dy, period)
+    distance = pair_distance(dx, dy, pair_scale)
+    keep = distance >= 1
+    if row_start == col_start:
+        # Diagonal tile: upper triangle only.
+        keep &= np.arange(col_start, col_stop)[None, :] > np.arange(row_start, row_stop)[:, None]
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        scale = np.where(keep, pair_scale(distance, rows, cols), 0.0)
+    fx = scale * dx
+    fy = scale * dy
+    return fx.sum(axis=1), fy.sum(axis=1), fx.sum(axis=0), fy.sum(axis=0)
+
+
+def tiled_net_force(x, y, pair_scale, workers, period=None):
+    """
+    Same result contract as forces._pairwise_net_force, computed tile by tile
+    on a pool of workers threads.
+    """
+    return block_net_force(x, y, [(0, len(x), 0, len(x), pair_scale)], workers, period)
+
+
+def block_net_force(x, y, blocks, workers=1, period=None):
+    """
+    Net force from a list of (row_start, row_stop, col_start, col_stop,
+    pair_scale) blocks of the interaction matrix. A block with equal row and
+    column ranges covers the pairs inside that range once; otherwise it covers
+    every row x column pair. Blocks are cut into tiles, run on the pool when
+    workers > 1 and reduced in order.
+    """
+    n = len(x)
+    net_x = np.zeros(n)
+    net_y = np.zeros(n)
+    tiles = []
+    for row_start, row_stop, col_start, col_stop, pair_scale in blocks:
+        rows = [(start, min(start + TILE, row_stop)) for start in range(row_start, row_stop, TILE)]
+        cols = [(start, min(start + TILE, col_stop)) for start in range(col_start, col_stop, TILE)]
+        for b, (r0, r1) in enumerate(rows):
+            for c0, c1 in (cols[b:] if row_start == col_start else cols):
+                tiles.append((pair_scale, r0, r1, c0, c1))
+
+    if workers > 1 and len(tiles) > 1:
+        pool = get_pool(workers)
+        futures = [pool.submit(_tile, x, y, *tile, period) for tile in tiles]
+        results = (future.result() for future in futures)
+    else:
+        results = (_tile(x, y, *tile, period) for tile in tiles)
+    for (_, r0, r1, c0, c1), (row_x, row_y, col_x, col_y) in zip(tiles, results):
+        net_x[r0:r1] += row_x
+        net_y[r0:r1] += row_y
+        net_x[c0:c1] -= col_x
+        net_y[c0:c1] -= col_y
+    return net_x, net_y
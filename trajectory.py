@@ -0,0 +1,129 @@
+import json
+import struct
+import numpy as np
+
+# -----------------------------------------------------------------------------
+# Binary trajectory format
+# -----------------------------------------------------------------------------
+# A recording is two append-only files:
+#
+#   <name>.traj   data file
+#       header:  MAGIC (8 bytes) | uint32 header length | JSON header
+#                (format version and simulation parameters), zero-padded to
+#                a multiple of 8 bytes
+#       frames:  uint32 count | uint32 step |
+#                int8 species[count] (zero-padded to a multiple of 4) |
+#                float32 x[count] | y[count] | vx[count] | vy[count]
+#
+#   <name>.traj.idx   index file
+#       uint64 byte offset of each frame in the data file
+#
+# Details:
+#   - Species are stored per frame because particles can be added and removed
+#     while recording (P/E/N/V, Backspace, Ctrl+Delete).
+#   - The reader memory-maps both files, so frame i is found in O(1) through
+#     the index and its arrays are views into the mapping; nothing is loaded
+#     until it is touched.
+#   - A frame only counts once its index entry is written, so a recording
+#     cut short by a crash is still readable up to the last indexed frame.
+# -----------------------------------------------------------------------------
+MAGIC = b"PPTRAJ01"
+VERSION = 1
+_FRAME_HEADER = struct.Struct("<II")
+
+
+def _padded(size, multiple):
+    return (size + multiple - 1) // multiple * multiple
+
+
+class Trajectory_Writer:
+    """
+    Appends one frame per call to write_frame(particles).
+    - particles is a Particle_Store (anything with x/y/vx/vy/species arrays)
+    - close() (or using it as a context manager) flushes both files
+    """
+    def __init__(self, path, parameters=None):
+        self.path = path
+        self.frame_count = 0
+        self._data = open(path, "wb")
+        self._index = open(path + ".idx", "wb")
+
+        header = json.dumps({"version": VERSION, "parameters": parameters or {}}).encode("utf-8")
+        block = MAGIC + struct.pack("<I", len(header)) + header
+        self._data.write(block + bytes(_padded(len(block), 8) - len(block)))
+        self._offset = self._data.tell()
+
+    def write_frame(self, particles, step=0):
+        count = len(particles)
+        species = np.ascontiguousarray(particles.species, dtype=np.int8).tobytes()
+        state = np.empty((4, count), dtype=np.float32)
+        state[0], state[1] = particles.x, particles.y
+        state[2], state[3] = particles.vx, particles.vy
+
+        frame = (_FRAME_HEADER.pack(count, step) + species + bytes(_padded(count, 4) - count)
+                 + state.tobytes())
+        self._data.write(frame)
+        self._index.write(struct.pack("<Q", self._offset))
+        self._offset += len(frame)
+        self.frame_count += 1
+
+    def close(self):
+        if not self._data.closed:
+            self._data.close()
+            self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class Trajectory_Frame:
+    """
+    One recorded frame. The arrays are read-only views into the mapped file.
+    """
+    def __init__(self, step, species, x, y, vx, vy):
+        self.step = step
+        self.species = species
+        self.x, self.y = x, y
+        self.vx, self.vy = vx, vy
+
+    def __len__(self):
+        return len(self.x)
+
+
+class Trajectory_Reader:
+    """
+    Random access to a recording: reader.frame(i) for any 0 <= i < frame_count.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._data = np.memmap(path, dtype=np.uint8, mode="r")
+        if bytes(self._data[:8]) != MAGIC:
+            raise ValueError(f"{path} is not a trajectory file")
+        header_length = struct.unpack("<I", bytes(self._data[8:12]))[0]
+        header = json.loads(bytes(self._data[12:12 + header_length]).decode("utf-8"))
+        self.version = header["version"]
+        self.parameters = header["parameters"]
+
+        try:
+            self._offsets = np.memmap(path + ".idx", dtype="<u8", mode="r")
+        except ValueError:
+            # Empty index file: nothing recorded yet.
+            self._offsets = np.zeros(0, dtype="<u8")
+        self.frame_count = len(self._offsets)
+
+    def __len__(self):
+        return self.frame_count
+
+    def frame(self, i):
+        if not 0 <= i < self.frame_count:
+            raise IndexError("trajectory frame out of range")
+        offset = int(self._offsets[i])
+        count, step = _FRAME_HEADER.unpack(bytes(self._data[offset:offset + _FRAME_HEADER.size]))
+        offset += _FRAME_HEADER.size
+        species = self._data[offset:offset + count].view(np.int8)
+        offset += _padded(count, 4)
+        state = self._data[offset:offset + 16 * count].view(np.float32).reshape(4, count)
+        return Trajectory_Frame(step, species, state[0], state[1], state[2], state[3])
@@ -0,0 +1,279 @@
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from coarsening import Cluster_Coarsening
+from forces import Electromagnetic_force, strong_nuclear_force, Force_Field, BLOCK_PAIRS
+from integrators import INTEGRATORS
+from scenes import SCENES
+from simulation import Simulation
+from sleeping import Sleep_Tracker
+
+# -----------------------------------------------------------------------------
+# Accuracy-versus-speed validation
+# -----------------------------------------------------------------------------
+# Runs reference scenes through every force backend and integrator and
+# checks each backend against the exact direct sum, so a faster path can be
+# made a default only with known error.
+#
+# Per (scene, integrator, backend) run of --steps steps:
+#   - force error:  at --samples evenly spaced steps, the backend's forces
+#                   are compared with the exact direct sum (both EM and strong
+#                   force) on the same state. Sleeping is sampled through the
+#                   forces it cached for the last step, since asking it for
+#                   forces would update its cache and wake particles, i.e.
+#                   change the run being measured. The error of particle i is
+#                   |F_i - F_exact_i| / rms|F_exact|, i.e. relative to the
+#                   typical force, because per-particle ratios blow up where
+#                   forces cancel. p50 / p90 / p99 / max over all samples.
+#   - energy drift: max |E(t) - E(0)| / |E(0)| of kinetic + EM + strong
+#                   potential energy over the run. The legacy integrator
+#                   damps every step, so its drift is large by design;
+#                   compare against the direct row of the same integrator.
+#   - divergence:   RMS distance between the final positions and those of
+#                   the direct backend with the same integrator.
+#   - wall time per step (measurements excluded) and peak traced memory
+#     (tracemalloc, which sees numpy buffers).
+#   - composites: for the coarsening backend, the most clusters coarsened in
+#     any step, so a run where no nucleus ever settled (and the error is
+#     trivially that of the direct sum) shows up as 0.
+#   - incremental: for the sleeping backend, how many force evaluations took
+#     the incremental path; 0 means the run only checked full evaluations.
+#
+# A run fails when its p99 force error exceeds the backend's stated bound
+# (BACKENDS, or --bound NAME=VALUE); the exit status is then 1. Within each (scene, integrator) the
+# backends that no other backend beats on both time and p99 error are marked
+# as the Pareto front.
+#
+# Usage:
+#   python validate.py
+#   python validate.py --scenes plasma --count 2000 --backends direct,em_particle_mesh
+#   python validate.py --output validation.json --bound em_particle_mesh=1e-2
+#
+# Backends that only compute all forces at once (Barnes-Hut, particle mesh)
+# gain nothing from the block integrator's per-subset force requests, so that
+# combination is slow by nature.
+# -----------------------------------------------------------------------------
+# gas is the default scene that settles within --steps (the others keep
+# moving), so it is where the sleeping backend's incremental path is checked.
+DEFAULT_SCENES = ("mixed", "nuclei", "plasma", "gas")
+DEFAULT_COUNT = 400
+DEFAULT_STEPS = 30
+DEFAULT_SAMPLES = 4
+
+# name -> (Simulation keyword arguments, stated bound on the p99 force error).
+# The strong force is effectively a long-range r^-1.75 law with the default
+# constants, so the cell list's cutoff drops a real tail: its bound is loose.
+# Coarsening and sleeping settle after 5 steps instead of SETTLE_STEPS and
+# SLEEP_FRAMES so that they take effect within the default --steps.
+BACKENDS = {
+    "direct": (lambda: {}, 1e-9),
+    "em_barnes_hut": (lambda: {"em_force": Electromagnetic_force(mode="barnes_hut")}, 5e-2),
+    "em_particle_mesh": (lambda: {"em_force": Electromagnetic_force(mode="particle_mesh")}, 5e-2),
+    "strong_cell_list": (lambda: {"strong_force": strong_nuclear_force(mode="cell_list")}, 3e-1),
+    "strong_table": (lambda: {"strong_force": strong_nuclear_force(use_table=True)}, 1e-3),
+    "coarsening": (lambda: {"coarsening": Cluster_Coarsening(settle_steps=5)}, 5e-2),
+    "sleeping": (lambda: {"sleeping": Sleep_Tracker(sleep_frames=5)}, 1e-9),
+}
+
+
+def strong_potential_table(strong_force, r_max=1e6, points=4096):
+    """
+    U(r) = -integral of the strong force magnitude from r to infinity, on a
+    log grid from 1 to r_max (the tail beyond r_max is integrated as a pure
+    power law). Returns a function of distance.
+    """
+    r = np.geomspace(1.0, r_max, points)
+    magnitude = strong_force.force_magnitude(r)
+    segments = 0.5 * (magnitude[1:] + magnitude[:-1]) * np.diff(r)
+    beyond = np.append(np.cumsum(segments[::-1])[::-1], 0.0)
+    beyond += magnitude[-1] * r_max / 0.75
+    log_r = np.log(r)
+    return lambda distance: -np.interp(np.log(distance), log_r, beyond)
+
+
+def total_energy(simulation, strong_potential):
+    particles = simulation.particles
+    x, y, charge, mass = particles.x, particles.y, particles.charge, particles.mass
+    k = simulation.em_force.COLOUMBS_CONSTANT
+    baryon = simulation.strong_force.eligible(charge, mass)
+    n = len(x)
+    potential = 0.0
+    rows_per_block = max(1, BLOCK_PAIRS // max(n, 1))
+    for start in range(0, n, rows_per_block):
+        rows = slice(start, min(start + rows_per_block, n))
+        distance = np.hypot(x[None, :] - x[rows, None], y[None, :] - y[rows, None])
+        keep = (np.arange(n)[None, :] > np.arange(start, rows.stop)[:, None]) & (distance >= 1)
+        distance = np.where(keep, distance, 1.0)
+        potential += np.sum(np.where(keep, k * charge[rows, None] * charge[None, :] / distance, 0.0))
+        strong = keep & baryon[rows, None] & baryon[None, :]
+        potential += np.sum(np.where(strong, strong_potential(distance), 0.0))
+    return simulation.kinetic_energy() + potential
+
+
+def sampled_forces(simulation):
+    """
+    (x, y, fx, fy): positions and the backend's forces on them, or None if a
+    Sleep_Tracker has not evaluated any yet.
+    """
+    if simulation.sleeping is not None:
+        return simulation.sleeping.cached_forces()
+    particles = simulation.particles
+    return (particles.x, particles.y) + simulation.compute_forces()
+
+
+def run_backend(scene, count, seed, integrator_name, backend_name, steps, samples):
+    make_options, _ = BACKENDS[backend_name]
+    simulation = Simulation(particles=SCENES[scene](count, seed=seed), integrator=INTEGRATORS[integrator_name](),
+                            **make_options())
+    particles = simulation.particles
+    reference = Force_Field([Electromagnetic_force(), strong_nuclear_force()])
+    strong_potential = strong_potential_table(simulation.strong_force)
+    sample_steps = set(np.linspace(0, steps, samples).round().astype(int).tolist())
+
+    errors = []
+    composites = None
+    energy_start = total_energy(simulation, strong_potential)
+    drift = 0.0
+    wall = 0.0
+    peak = 0
+    tracemalloc.start()
+    for step in range(steps + 1):
+        if step in sample_steps:
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            sample = sampled_forces(simulation)
+            if sample is not None:
+                x, y, fx, fy = sample
+                exact_x, exact_y = reference.calculate_net_force_arrays(x, y, particles.charge, particles.mass)
+                scale = np.sqrt(np.mean(exact_x ** 2 + exact_y ** 2)) or 1.0
+                errors.append(np.hypot(fx - exact_x, fy - exact_y) / scale)
+            energy = total_energy(simulation, strong_potential)
+            drift = max(drift, abs(energy - energy_start) / (abs(energy_start) or 1.0))
+            tracemalloc.reset_peak()
+        if step < steps:
+            start = time.perf_counter()
+            simulation.step()
+            wall += time.perf_counter() - start
+            if simulation.coarsening is not None:
+                composites = max(composites or 0, simulation.coarsening.composites)
+    peak = max(peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+
+    errors = np.concatenate(errors) if errors else np.zeros(0)
+    p50, p90, p99 = np.percentile(errors, [50, 90, 99]) if len(errors) else (0.0, 0.0, 0.0)
+    return {
+        "scene": scene, "integrator": integrator_name, "backend": backend_name, "n": len(particles),
+        "seconds_per_step": wall / max(steps, 1), "peak_bytes": peak,
+        "error_p50": float(p50), "error_p90": float(p90), "error_p99": float(p99),
+        "error_max": float(errors.max()) if len(errors) else 0.0,
+        "energy_drift": drift, "composites": composites,
+        "incremental": None if simulation.sleeping is None else simulation.sleeping.incremental_evaluations,
+    }, particles.x.copy(), particles.y.copy()
+
+
+def pareto_front(rows):
+    """
+    Mark rows that no other row beats on both seconds_per_step and error_p99.
+    """
+    for row in rows:
+        row["pareto"] = not any(
+            other is not row
+            and other["seconds_per_step"] <= row["seconds_per_step"] and other["error_p99"] <= row["error_p99"]
+            and (other["seconds_per_step"] < row["seconds_per_step"] or other["error_p99"] < row["error_p99"])
+            for other in rows)
+
+
+def run(scenes, integrators, backends, count, steps, samples, seed, bounds):
+    results = []
+    for scene in scenes:
+        for integrator in integrators:
+            group = []
+            reference_x = reference_y = None
+            # direct first: it is the reference for trajectory divergence.
+            for backend in sorted(backends, key=lambda name: name != "direct"):
+                row, x, y = run_backend(scene, count, seed, integrator, backend, steps, samples)
+                if backend == "direct":
+                    reference_x, reference_y = x, y
+                if reference_x is not None and len(x) == len(reference_x):
+                    row["divergence"] = float(np.sqrt(np.mean((x - reference_x) ** 2 + (y - reference_y) ** 2)))
+                else:
+                    row["divergence"] = None
+                row["bound"] = bounds[backend]
+                row["passed"] = row["error_p99"] <= row["bound"]
+                group.append(row)
+            pareto_front(group)
+            for row in sorted(group, key=lambda row: row["seconds_per_step"]):
+                print_row(row)
+            results.extend(group)
+    return results
+
+
+HEADER = (f"{'scene':>8} {'integrator':>10} {'backend':<17} {'ms/step':>9} {'peak MB':>8} {'err p50':>9} "
+          f"{'err p99':>9} {'err max':>9} {'drift':>9} {'diverge':>9} {'clusters':>8} {'incr':>5}  front  status")
+
+
+def print_row(row):
+    divergence = "-" if row["divergence"] is None else f"{row['divergence']:9.3g}"
+    composites = "-" if row["composites"] is None else row["composites"]
+    incremental = "-" if row["incremental"] is None else row["incremental"]
+    print(f"{row['scene']:>8} {row['integrator']:>10} {row['backend']:<17} "
+          f"{row['seconds_per_step'] * 1000:9.3f} {row['peak_bytes'] / 2 ** 20:8.1f} "
+          f"{row['error_p50']:9.2e} {row['error_p99']:9.2e} {row['error_max']:9.2e} "
+          f"{row['energy_drift']:9.2e} {divergence:>9} {composites:>8} {incremental:>5}  "
+          f"{'*' if row['pareto'] else ' ':^5}  "
+          f"{'ok' if row['passed'] else 'FAIL (bound ' + format(row['bound'], '.0e') + ')'}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check approximate force backends against the exact direct sum.")
+    parser.add_argument("--scenes", default=",".join(DEFAULT_SCENES), help="comma-separated scene names")
+    parser.add_argument("--integrators", default=",".join(INTEGRATORS), help="comma-separated integrators")
+    parser.add_argument("--backends", default=",".join(BACKENDS), help="comma-separated force backends")
+    parser.add_argument("--count", type=int, default=DEFAULT_COUNT, help="particles per scene")
+    parser.add_argument("--steps", type=int, default=DEFAULT_STEPS, help="steps per run")
+    parser.add_argument("--samples", type=int, default=DEFAULT_SAMPLES, help="force error samples per run")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for the scenes")
+    parser.add_argument("--output", metavar="PATH", help="also write the table as JSON")
+    parser.add_argument("--bound", action="append", default=[], metavar="NAME=VALUE",
+                        help="override a backend's p99 force error bound")
+    args = parser.parse_args(argv)
+
+    scenes = args.scenes.split(",")
+    integrators = args.integrators.split(",")
+    backends = args.backends.split(",")
+    bounds = {name: bound for name, (_, bound) in BACKENDS.items()}
+    for override in args.bound:
+        name, _, value = override.partition("=")
+        try:
+            bounds[name] = float(value)
+        except ValueError:
+            parser.error(f"bad --bound {override!r}, expected NAME=VALUE")
+    for kind, names, known in (("scenes", scenes, SCENES), ("integrators", integrators, INTEGRATORS),
+                               ("backends", backends + list(bounds), BACKENDS)):
+        unknown = [name for name in names if name not in known]
+        if unknown:
+            parser.error(f"unknown {kind}: {', '.join(unknown)}")
+    print(HEADER)
+    results = run(scenes, integrators, backends, args.count, args.steps, args.samples, args.seed, bounds)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"count": args.count, "steps": args.steps, "seed": args.seed, "results": results}, f, indent=2)
+
+    for backend, key in (("coarsening", "composites"), ("sleeping", "incremental")):
+        rows = [row for row in results if row["backend"] == backend]
+        if rows and not any(row[key] for row in rows):
+            print(f"NOTE: {backend} never took effect ({key} is 0 in every run), "
+                  f"so its rows only check the direct sum")
+    failed = [row for row in results if not row["passed"]]
+    for row in failed:
+        print(f"FAILED: {row['backend']} on {row['scene']}/{row['integrator']}: "
+              f"p99 force error {row['error_p99']:.2e} > bound {row['bound']:.0e}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())